@@ -4,12 +4,17 @@ import glob
 import pandas as pd
 import functions_acquisition
 import functions_data_and_pipeline
+import functions_video
+import functions_sweep
+import functions_resources
+import functions_progress
+import functions_summary
+import functions_storage
+import functions_explorer
+import functions_liveview
+import functions_monitor
 import subprocess, tempfile, os, pathlib
 
-import importlib
-importlib.reload(functions_acquisition)
-importlib.reload(functions_data_and_pipeline)
-
 # Helper: return a browser-playable path for a given video file
 def _get_playable_video_path(src_path: str, fps_fallback: str = "30") -> str:
     """
@@ -24,8 +29,10 @@ def _get_playable_video_path(src_path: str, fps_fallback: str = "30") -> str:
     if src_path in cache and pathlib.Path(cache[src_path]).exists():
         return cache[src_path]
 
-    # Create a temp file that survives until the Streamlit run ends
-    tmp_mp4 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
+    # Create a temp file that survives until the Streamlit run ends; leftovers
+    # in this directory are removed by the storage manager
+    os.makedirs(functions_video.REMUX_CACHE_DIR, exist_ok=True)
+    tmp_mp4 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", dir=functions_video.REMUX_CACHE_DIR)
     tmp_mp4.close()  # we only need the name; ffmpeg will write to it
 
     # Remux: copy the raw bit-stream into an MP4 container (no re-encode)
@@ -154,7 +161,20 @@ def main():
         st.subheader("Run Acquisition")
         os.makedirs(tmp_dir, exist_ok=True)
         os.makedirs(out_dir, exist_ok=True)
-        functions_acquisition.run_acquisition(tmp_dir, out_dir, frames_per_file, frames_per_second)
+        with st.expander("Disk Space", expanded=False):
+            preflight = functions_storage.show_storage_panel(
+                tmp_dir, out_dir, os.path.abspath(st.session_state.get("result_dir", "data/out")),
+                frames_per_second=frames_per_second, bitrate=params.get("bitrate"), subdir=cam_name)
+        functions_acquisition.run_acquisition(tmp_dir, out_dir, frames_per_file, frames_per_second, preflight=preflight)
+        if st.session_state.get("acq_running"):
+            functions_storage.get_storage_guard().start()
+            with st.expander("Live View", expanded=True):
+                functions_liveview.show_live_view(tmp_dir, cam_name)
+            with st.expander("Detection Monitor", expanded=True):
+                functions_monitor.show_monitor_panel(tmp_dir, cam_name)
+        else:
+            functions_monitor.stop_monitor(tmp_dir, cam_name)
+            functions_storage.get_storage_guard().stop()
 
     st.divider()
 
@@ -163,7 +183,7 @@ def main():
     ########################################################################################################
     st.subheader("Pipeline on Existing Videos")
     input_dir = st.text_input("Pipeline input directory", value=os.path.join(out_dir,cam_name))
-    result_dir = st.text_input("Pipeline output directory", value="data/out")
+    result_dir = st.text_input("Pipeline output directory", value="data/out", key="result_dir")
     input_dir = os.path.abspath(input_dir)
     result_dir = os.path.abspath(result_dir)
 
@@ -198,6 +218,28 @@ def main():
         with col2:
             tracks_ext = st.text_input("tracks_ext", value="-tracks")
 
+        st.write("CPU resources for running several videos at once:")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            resource_mode = st.selectbox("resource_mode", ["off", "manual", "auto"], index=0,
+                                         help="off: one video at a time in the GUI process; "
+                                              "manual/auto: concurrent worker processes with per-worker thread limits")
+        with col2:
+            n_jobs = st.number_input("concurrent_jobs", min_value=1, max_value=len(functions_resources.available_cpus()),
+                                     value=1, disabled=resource_mode != "manual")
+        with col3:
+            threads_per_job = st.number_input("threads_per_job (0 = share cores)", min_value=0, max_value=256,
+                                              value=0, disabled=resource_mode != "manual")
+        with col4:
+            cpu_pinning = st.selectbox("cpu_pinning", functions_resources.PINNING_OPTIONS, index=0,
+                                       disabled=resource_mode == "off")
+        if resource_mode == "auto":
+            calibration = functions_resources.get_calibration()
+            n_jobs = calibration["n_jobs"]
+            threads_per_job = calibration["threads_per_job"]
+            st.caption(f"Auto: {n_jobs} concurrent jobs with {threads_per_job} threads each "
+                       f"(calibrated in {calibration['duration_s']:.1f} s)")
+
     # ------------------------
     # 2) VIDEO SETTINGS
     # ------------------------
@@ -251,6 +293,15 @@ def main():
         "detect_conf_threshold": detect_conf_threshold
     }
 
+    # ------------------------
+    # PER-BEE SUMMARY OVER ALL PROCESSED VIDEOS
+    # ------------------------
+    with st.expander("Per-bee Summary", expanded=False):
+        functions_summary.show_summary_panel(result_dir, tracks_ext=tracks_ext, save_filetype=save_filetype)
+
+    with st.expander("Trajectory Explorer", expanded=False):
+        functions_explorer.show_explorer_panel(result_dir, tracks_ext=tracks_ext)
+
     # ------------------------
     # 3) SHOW AVAILABLE VIDEOS
     # ------------------------
@@ -348,18 +399,45 @@ def main():
         if selected_rows.empty:
             st.warning("No videos selected.")
         else:
-            # Here you would pass the selected videos to your pipeline
-            for _, row in selected_rows.iterrows():
-                video_name = row["video_name"]
-                video_full_path = os.path.join(input_dir, video_name)
-                functions_data_and_pipeline.run_pipeline_on_video(video_full_path, result_dir, **pipeline_params)
-                st.write(f"Running pipeline on: {video_name}")
+            if resource_mode == "off":
+                for _, row in selected_rows.iterrows():
+                    video_name = row["video_name"]
+                    video_full_path = os.path.join(input_dir, video_name)
+                    functions_data_and_pipeline.run_pipeline_on_video(video_full_path, result_dir, **pipeline_params)
+                    st.write(f"Running pipeline on: {video_name}")
+            else:
+                workers = functions_resources.plan_workers(n_jobs, threads_per_job=threads_per_job, pinning=cpu_pinning)
+                st.write(f"Running pipeline with {len(workers)} concurrent workers: "
+                         + ", ".join(f"{w['threads']} threads" + (f" on CPUs {w['cpus']}" if w["cpus"] else "") for w in workers))
+                video_paths = [os.path.join(input_dir, video_name) for video_name in selected_rows["video_name"]]
+                # one status line per video, updated from the progress the workers report
+                status_lines = {os.path.basename(p): st.empty() for p in video_paths}
+                for name, line in status_lines.items():
+                    line.write(f"{name}: queued")
+
+                def show_status(status):
+                    if status["video"] in status_lines:
+                        status_lines[status["video"]].write(functions_progress.format_status(status))
+
+                for video_full_path, error in functions_resources.run_pipeline_jobs(video_paths, result_dir, workers,
+                                                                                    on_status=show_status, **pipeline_params):
+                    line = status_lines[os.path.basename(video_full_path)]
+                    if error is None:
+                        line.write(f"Finished: {os.path.basename(video_full_path)}")
+                    else:
+                        line.error(f"Pipeline failed on {os.path.basename(video_full_path)}: {error}")
             st.success("Pipeline completed on selected files.")
 
     # -------------------------------------------------------------------------
     # 5) "Play Selected" button
     # -------------------------------------------------------------------------
     selected_rows = edited_df[edited_df["select"] == True]
+    col1, col2 = st.columns(2)
+    with col1:
+        preview_size = st.selectbox("Preview resolution", list(functions_video.PREVIEW_SIZES) + ["original"], index=0,
+                                    help="Low resolution previews are cached and stream quickly; 'original' plays the full file")
+    with col2:
+        start_time = st.number_input("Start at (s)", min_value=0, value=0)
     if st.button("Play Selected"):
         if selected_rows.empty:
             st.warning("No rows selected!")
@@ -368,14 +446,19 @@ def main():
                 if row["has_video"]:
                     st.write(f"Tracked video for {row['video_name']}")
                     base_name = os.path.splitext(os.path.basename(row["video_name"]))[0]
-                    video_path_to_play = os.path.join(result_dir, f"{base_name}-tracked-video.mp4")
+                    src_path = os.path.join(result_dir, f"{base_name}-tracked-video.mp4")
                 else:
                     st.write(f"Raw video for {row['video_name']}")
-                    raw_path = os.path.join(input_dir, row["video_name"])
+                    src_path = os.path.join(input_dir, row["video_name"])
+
+                video_path_to_play = None
+                if preview_size != "original":
+                    video_path_to_play = functions_video.get_preview_path(src_path, preview_size)
+                if video_path_to_play is None:
                     # ensure browser-playable path
-                    video_path_to_play = _get_playable_video_path(raw_path)
+                    video_path_to_play = _get_playable_video_path(src_path)
 
-                st.video(video_path_to_play)
+                st.video(video_path_to_play, start_time=int(start_time))
                 st.divider()                
 
     selected_rows = edited_df[edited_df["select"] == True]
@@ -393,6 +476,16 @@ def main():
                     st.write("\tno image found")                    
                 st.divider()                
 
+    # -------------------------------------------------------------------------
+    # 6) Parameter sweep on the first selected video
+    # -------------------------------------------------------------------------
+    with st.expander("Detection Parameter Sweep", expanded=False):
+        if selected_rows.empty:
+            st.info("Select a video to tune the detection parameters on.")
+        else:
+            sweep_video_path = os.path.join(input_dir, selected_rows.iloc[0]["video_name"])
+            functions_sweep.show_parameter_sweep(sweep_video_path, timestamp_format=timestamp_format)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
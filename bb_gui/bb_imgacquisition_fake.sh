@@ -0,0 +1,52 @@
+#!/usr/bin/env bash
+# Fake bb_imgacquisition for testing the GUI without a camera.
+#
+# Reads tmp_dir, the first stream name, frames_per_second and frames_per_file
+# from the bb_imgacquisition config and keeps writing test-pattern segments
+# (.mp4 + .txt with one "cam-0_<timestamp>" line per frame) into
+# tmp_dir/<cam>, in real time, like the real acquisition does.
+#
+# Use it by pointing bb_gui at it:
+#   BB_IMGACQUISITION_COMMAND=/path/to/bb_imgacquisition_fake.sh bb_gui
+
+CONFIG="${BB_IMGACQUISITION_CONFIG:-$HOME/.config/bb_imgacquisition/config.json}"
+WIDTH="${FAKE_WIDTH:-1328}"
+HEIGHT="${FAKE_HEIGHT:-1152}"
+
+read -r TMP_DIR CAM FPS FPF < <(python3 - "$CONFIG" <<'EOF'
+import json, sys
+try:
+    config = json.load(open(sys.argv[1]))
+except FileNotFoundError:
+    config = {"tmp_dir": "data/tmp", "streams": {"cam-0": {"frames_per_second": 6, "frames_per_file": 360}}}
+cam = list(config["streams"])[0]
+stream = config["streams"][cam]
+print(config["tmp_dir"], cam, stream["frames_per_second"], stream["frames_per_file"])
+EOF
+)
+
+mkdir -p "$TMP_DIR/$CAM"
+trap 'kill $FFMPEG_PID 2>/dev/null; exit 0' TERM INT
+
+SEGMENT=0
+while true; do
+    NAME="$TMP_DIR/$CAM/segment$(printf '%06d' $SEGMENT)"
+    # fragmented mp4, so the segment is readable while it is being written
+    ffmpeg -loglevel error -y -re -f lavfi -i "testsrc2=size=${WIDTH}x${HEIGHT}:rate=${FPS}" \
+        -frames:v "$FPF" -c:v libx264 -preset ultrafast -g "$FPS" -pix_fmt yuv420p \
+        -movflags +frag_keyframe+empty_moov "$NAME.mp4" &
+    FFMPEG_PID=$!
+    # one timestamp line per frame, in real time (in python, date +%N is GNU only)
+    python3 - "$NAME.txt" "$CAM" "$FPS" "$FPF" <<'EOF'
+import sys, time
+from datetime import datetime, timezone
+path, cam, fps, n_frames = sys.argv[1], sys.argv[2], float(sys.argv[3]), int(sys.argv[4])
+with open(path, "w") as f:
+    for _ in range(n_frames):
+        f.write(f"{cam}_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%f')}.000Z\n")
+        f.flush()
+        time.sleep(1 / fps)
+EOF
+    wait $FFMPEG_PID
+    SEGMENT=$((SEGMENT + 1))
+done
@@ -144,16 +144,17 @@ def start_acquisition(command_path):
     st.session_state["acq_process"] = proc
     st.session_state["acq_status"] = "Running..."
 
-def run_acquisition(tmp_dir, out_dir, frames_per_file, frames_per_second):
+def run_acquisition(tmp_dir, out_dir, frames_per_file, frames_per_second, preflight=None):
     """
     Streamlit-based acquisition with containers to show Start/Stop.
     Uses a lockfile to handle page refresh.
+    *preflight* is an optional (status, message) disk space check; with status
+    "refuse" acquisition cannot be started, with "warn" the message is shown.
     """
 
     # Path to your acquisition script
-    command_path = "/home/swarm/bb_imgacquisition/build/bb_imgacquisition"
-    # For testing, fake script
-    # command_path = "/Users/jacob/Library/CloudStorage/Dropbox/Bayer-Bees/Startup-cockroaches/gui/bb_imgacquisition_fake.sh"
+    # For testing, set BB_IMGACQUISITION_COMMAND to the fake script bb_imgacquisition_fake.sh next to this file
+    command_path = os.environ.get("BB_IMGACQUISITION_COMMAND", "/home/swarm/bb_imgacquisition/build/bb_imgacquisition")
 
     # 1) Check if a process is already running via lockfile
     existing_pid = read_lockfile()
@@ -176,8 +177,14 @@ def run_acquisition(tmp_dir, out_dir, frames_per_file, frames_per_second):
 
         button_container = st.container()
         if not st.session_state["acq_running"]:
+            # Refuse to start if the planned recording does not fit on disk
+            preflight_status, preflight_message = preflight if preflight is not None else ("ok", "")
+            if preflight_status == "refuse":
+                button_container.error(f"Not enough disk space to start acquisition.\n\n{preflight_message}")
+            elif preflight_status == "warn":
+                button_container.warning(preflight_message)
             # Show Start button if not running
-            if button_container.button("Start Acquisition", key="start_button"):
+            if button_container.button("Start Acquisition", key="start_button", disabled=preflight_status == "refuse"):
                 start_acquisition(command_path)
                 st.session_state["acq_running"] = True
                 st.session_state["acq_status"] = "Running..."
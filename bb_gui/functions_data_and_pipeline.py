@@ -1,16 +1,22 @@
 import streamlit as st
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-from bb_behavior.io.videos import get_first_frame_from_video
-import bb_behavior.tracking
-from bb_binary.parsing import parse_video_fname
-from bb_behavior.vis.create_tracking_video import create_tracking_video
 from datetime import datetime
+import inspect
+import threading
 import pytz
-import cv2
+
+from functions_progress import PipelineProgress
+import functions_video
+from functions_video import FrameConsumer, FrameSource, FirstFrameSnapshot, ScaledClipWriter
+import functions_summary
+
+# bb_behavior, bb_binary, cv2 and matplotlib (and through them the TensorFlow /
+# PyTorch pipeline stack) are imported inside the functions that need them.
+# Streamlit re-executes the app script on every interaction, so keeping them out
+# of module scope keeps both the cold start and every rerun cheap.
 
 ########################################################
 # detection/tracking/pipeline code
@@ -18,6 +24,7 @@ import cv2
 
 def get_video_fps(video_path):
     """Extracts FPS from video metadata using OpenCV."""
+    import cv2
     cap = cv2.VideoCapture(video_path)
     fps = cap.get(cv2.CAP_PROP_FPS)  # Read FPS property
     cap.release()
@@ -27,8 +34,30 @@ def get_video_fps(video_path):
     else:
         return None  # Return None if FPS extraction fails
 
+def _supported_kwargs(func, **kwargs):
+    """The keyword arguments *func* accepts; optional bb_behavior arguments (e.g. progress) differ between versions."""
+    parameters = inspect.signature(func).parameters
+    return {name: value for name, value in kwargs.items() if name in parameters}
+
+def get_video_frame_count(video_path):
+    """Extracts the number of frames from video metadata using OpenCV (None if unknown)."""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    n_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+
+    if n_frames > 0:
+        return int(n_frames)
+    else:
+        return None
+
+@st.cache_resource(show_spinner="Loading detection pipeline...")
 def build_polo_pipeline():
-    """Build a bb_pipeline Pipeline using PoloLocalizer instead of Localizer."""
+    """Build a bb_pipeline Pipeline using PoloLocalizer instead of Localizer.
+
+    Cached as a Streamlit resource, so the models are loaded once per server
+    process instead of once per pipeline run.
+    """
     import pipeline
     import pipeline.pipeline
     import pipeline.objects
@@ -48,26 +77,64 @@ def build_polo_pipeline():
         **conf,
     )
 
-def get_detections(video_path, tag_pixel_diameter, use_clahe=True, decoder_pipeline=None):
-    # check for timestamps file
-    if os.path.isfile(video_path[:-4] + ".txt"):
-        frame_info, video_dataframe = bb_behavior.tracking.detect_markers_in_beesbook_video(
-            video_path,
-            ts_format="basler",
-            tag_pixel_diameter=tag_pixel_diameter,
-            verbose=False,
-            decoder_pipeline=decoder_pipeline,
-            n_frames=None,
-            cam_id=0,
-            confidence_filter=0.001,
-            clahe=use_clahe,
-            use_parallel_jobs=True,
-            progress=None,
-        )
-    else:
-        fps = get_video_fps(video_path)
-        frame_info, video_dataframe = bb_behavior.tracking.detect_markers_in_video(
-            video_path,
+@st.cache_resource(show_spinner="Loading detection pipeline...")
+def build_default_pipeline():
+    """The default bb_pipeline Pipeline (used for all formats but rpi).
+
+    Built by bb_behavior's own factory, the one detect_markers_in_video uses
+    when it gets no pipeline, so the detections are the same; cached as a
+    Streamlit resource like ``build_polo_pipeline``, so it is not built again
+    for every video. Returns None (bb_behavior builds its default per call) if
+    the installed bb_behavior has no such factory.
+    """
+    import bb_behavior.tracking.pipeline
+    get_default_pipeline = getattr(bb_behavior.tracking.pipeline, "get_default_pipeline", None)
+    if get_default_pipeline is None:
+        print("[INFO] bb_behavior has no get_default_pipeline, the detection pipeline is built for every call")
+        return None
+    return get_default_pipeline()
+
+DETECTION_COLUMNS = ['localizerSaliency', 'beeID', 'xpos', 'ypos', 'camID', 'zrotation',
+       'timestamp', 'frameIdx', 'frameId', 'detection_index', 'detection_type',
+       'confidence']
+
+# serializes detection calls that share one cached pipeline (pipeline runs, live view overlay, monitoring)
+# (reentrant, so a caller can hold it to time only the detection, e.g. the acquisition monitor)
+FRAME_DETECTION_LOCK = threading.RLock()
+
+def read_basler_timestamps(timestamps_path):
+    """POSIX timestamps of the frames listed in a basler .txt file (lines like cam-0_20250122T133601.562547.631Z)."""
+    timestamps = []
+    with open(timestamps_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            date_part, microseconds = line.split("_", 1)[-1].split(".")[:2]
+            timestamp = datetime.strptime(f"{date_part}.{microseconds}", "%Y%m%dT%H%M%S.%f")
+            timestamps.append(timestamp.replace(tzinfo=pytz.UTC).timestamp())
+    return timestamps
+
+def detect_markers_in_frames(frames, tag_pixel_diameter, timestamps=None, use_clahe=True, fps=6, decoder_pipeline=None,
+                             frame_offset=0, use_parallel_jobs=False):
+    """
+    Run the detection on in-memory frames (grayscale or BGR arrays of equal size).
+
+    *timestamps* (POSIX seconds, one per frame) default to (frame_offset + i) / fps.
+    The frameIdx column counts from *frame_offset*, so consecutive windows of one
+    video can be detected separately. Returns the detections dataframe.
+    """
+    import cv2
+    import bb_behavior.tracking
+
+    frames = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) if f.ndim == 3 else f for f in frames]
+    if timestamps is None:
+        timestamps = [(frame_offset + i) / fps for i in range(len(frames))]
+    with FRAME_DETECTION_LOCK:
+        _, video_dataframe = bb_behavior.tracking.detect_markers_in_video(
+            frames,
+            source_type="image",
+            timestamps=list(timestamps),
             tag_pixel_diameter=tag_pixel_diameter,
             fps=fps,
             verbose=False,
@@ -76,16 +143,17 @@ def get_detections(video_path, tag_pixel_diameter, use_clahe=True, decoder_pipel
             cam_id=0,
             confidence_filter=0.001,
             clahe=use_clahe,
-            use_parallel_jobs=True,
+            use_parallel_jobs=use_parallel_jobs,
             progress=None,
         )
     if video_dataframe is None:  # return an empty dataframe
-        video_dataframe = pd.DataFrame(columns=['localizerSaliency', 'beeID', 'xpos', 'ypos', 'camID', 'zrotation',
-       'timestamp', 'frameIdx', 'frameId', 'detection_index', 'detection_type',
-       'confidence'])
-    return frame_info, video_dataframe
+        video_dataframe = pd.DataFrame(columns=DETECTION_COLUMNS)
+    elif frame_offset:
+        video_dataframe["frameIdx"] += frame_offset
+    return video_dataframe
 
-def get_tracks(video_dataframe,cm_per_pixel):
+def get_tracks(video_dataframe,cm_per_pixel,progress=None):
+    import bb_behavior.tracking
     # Select only tagged animals for tracking
     video_dataframe = video_dataframe.copy()
     video_dataframe = video_dataframe[video_dataframe.detection_type == "TaggedBee"]    
@@ -99,7 +167,9 @@ def get_tracks(video_dataframe,cm_per_pixel):
             homography_scale=cm_per_pixel, 
             cam_id=0, 
             tracker_settings_kwargs=dict(detection_model_path=detection_model_path,
-                                         tracklet_model_path=tracklet_model_path))    
+                                         tracklet_model_path=tracklet_model_path),
+            # only bb_behavior versions with a per-frame hook in tracking accept a progress callback
+            **_supported_kwargs(bb_behavior.tracking.track_detections_dataframe, progress=progress))
     if tracks_df is None:  # return an empty dataframe 
         tracks_df = pd.DataFrame(columns=['bee_id', 'bee_id_confidence', 'track_id', 'x_pixels', 'y_pixels',
        'orientation_pixels', 'x_hive', 'y_hive', 'orientation_hive',
@@ -108,7 +178,18 @@ def get_tracks(video_dataframe,cm_per_pixel):
     tracks_df['detection_type'] = 'TaggedBee'  # save this as a string
     return tracks_df
 
+def _clip_scale(video_path, clip_path):
+    """Width ratio of a cached downscaled clip to its source video."""
+    import cv2
+    widths = []
+    for path in (video_path, clip_path):
+        cap = cv2.VideoCapture(path)
+        widths.append(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        cap.release()
+    return widths[1] / widths[0]
+
 def display_detection_results(first_frame_image,video_dataframe=None,tracks_df=None,detectionspng_filename=None):
+    import matplotlib.pyplot as plt
     f, ax = plt.subplots(figsize=(15, 15))
     ax.imshow(first_frame_image)
     orientation_plotted = False
@@ -144,13 +225,203 @@ def display_detection_results(first_frame_image,video_dataframe=None,tracks_df=N
         plt.close()
     return True
 
+########################################################
+# streaming detection results I/O
+########################################################
+
+# Number of detection rows written per Parquet row group / read per batch.
+DETECTION_BATCH_ROWS = 100_000
+# Number of frames detected per call. One window of full resolution grayscale frames is held in
+# memory (16 x 24 MB at 5312x4608); larger windows spread the start of bb_behavior's parallel jobs
+# over more frames.
+DETECTION_WINDOW_FRAMES = 16
+
+class DetectionParquetWriter:
+    """
+    Incremental Parquet writer for detection results.
+
+    Dataframes passed to ``write`` are buffered and flushed as row groups of
+    ``batch_rows`` rows, so only one batch is held as an Arrow table at a time.
+    The file is written to a temporary name and moved into place on ``close``,
+    so an interrupted run never leaves a truncated results file behind.
+    """
+
+    def __init__(self, path, batch_rows=DETECTION_BATCH_ROWS):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.tmp_path = path + ".part"
+        self.schema = None
+        self.n_rows = 0
+        self._writer = None
+        self._buffer = []
+        self._buffered_rows = 0
+        self._empty = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, df):
+        """Append the rows of *df*, flushing full batches to disk."""
+        if len(df) == 0:
+            if self._empty is None:
+                self._empty = df  # keep the columns in case the whole result is empty
+            return
+        for start in range(0, len(df), self.batch_rows):
+            chunk = df.iloc[start:start + self.batch_rows]
+            self._buffer.append(chunk)
+            self._buffered_rows += len(chunk)
+            if self._buffered_rows >= self.batch_rows:
+                self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._buffer:
+            return
+        df = pd.concat(self._buffer, ignore_index=True) if len(self._buffer) > 1 else self._buffer[0]
+        self._buffer = []
+        self._buffered_rows = 0
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            self.schema = table.schema
+            self._writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self._writer.write_table(table, row_group_size=self.batch_rows)
+        self.n_rows += table.num_rows
+
+    def close(self):
+        if self._writer is None and not self._buffer:
+            self._buffer = [self._empty if self._empty is not None else pd.DataFrame(columns=DETECTION_COLUMNS)]
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class DetectionCSVWriter(DetectionParquetWriter):
+    """Incremental CSV writer for detection results, with the same interface as DetectionParquetWriter."""
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        df = pd.concat(self._buffer, ignore_index=True) if len(self._buffer) > 1 else self._buffer[0]
+        self._buffer = []
+        self._buffered_rows = 0
+        if self._writer is None:
+            self.schema = list(df.columns)
+            self._writer = open(self.tmp_path, "w", newline="")
+            df.to_csv(self._writer, index=False)
+        else:
+            df.reindex(columns=self.schema).to_csv(self._writer, index=False, header=False)
+        self.n_rows += len(df)
+
+def open_detection_writer(detections_filename, save_filetype="parquet", batch_rows=DETECTION_BATCH_ROWS):
+    """Incremental writer for *detections_filename*; use as a context manager."""
+    writer_class = DetectionCSVWriter if save_filetype == "csv" else DetectionParquetWriter
+    return writer_class(detections_filename, batch_rows=batch_rows)
+
+class DetectionWindowConsumer(FrameConsumer):
+    """
+    FrameSource consumer that runs the detection on windows of *window_frames*
+    frames and writes each window's detections to *writer* as soon as it is
+    done, so memory use does not grow with the length of the video.
+    """
+
+    def __init__(self, writer, tag_pixel_diameter, timestamps=None, fps=6, use_clahe=True, decoder_pipeline=None,
+                 window_frames=DETECTION_WINDOW_FRAMES):
+        self.writer = writer
+        self.tag_pixel_diameter = tag_pixel_diameter
+        self.timestamps = timestamps
+        self.fps = fps or 6
+        self.use_clahe = use_clahe
+        self.decoder_pipeline = decoder_pipeline
+        self.window_frames = window_frames
+        self._frames = []
+        self._offset = 0
+
+    def _timestamp(self, frame_idx):
+        if not self.timestamps:
+            return frame_idx / self.fps
+        if frame_idx < len(self.timestamps):
+            return self.timestamps[frame_idx]
+        # more frames than timestamp lines: continue at the nominal frame rate
+        return self.timestamps[-1] + (frame_idx - len(self.timestamps) + 1) / self.fps
+
+    def _detect_window(self):
+        if not self._frames:
+            return
+        timestamps = [self._timestamp(self._offset + i) for i in range(len(self._frames))]
+        video_dataframe = detect_markers_in_frames(
+            self._frames, self.tag_pixel_diameter, timestamps=timestamps, use_clahe=self.use_clahe, fps=self.fps,
+            decoder_pipeline=self.decoder_pipeline, frame_offset=self._offset, use_parallel_jobs=True)
+        self.writer.write(video_dataframe)
+        self._offset += len(self._frames)
+        self._frames = []
+
+    def consume(self, frame_idx, frame):
+        import cv2
+        self._frames.append(frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        if len(self._frames) >= self.window_frames:
+            self._detect_window()
+        return True
+
+    def close(self):
+        self._detect_window()
+
+def iter_detection_batches(detections_filename, save_filetype="parquet", columns=None, batch_rows=DETECTION_BATCH_ROWS):
+    """Lazily yield the detections file as dataframes of at most *batch_rows* rows."""
+    if save_filetype == "csv":
+        yield from pd.read_csv(detections_filename, usecols=columns, chunksize=batch_rows)
+    else:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(detections_filename)
+        if parquet_file.metadata.num_rows == 0:
+            yield parquet_file.schema_arrow.empty_table().to_pandas()
+            return
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+
+def read_detections(detections_filename, save_filetype="parquet", columns=None, detection_type=None,
+                    batch_rows=DETECTION_BATCH_ROWS):
+    """
+    Read detections back batch by batch, keeping only *columns* and, if given,
+    only rows of *detection_type* (e.g. "TaggedBee"), so that only the selected
+    part of the file is ever held in memory.
+    """
+    if columns is not None and detection_type is not None and "detection_type" not in columns:
+        columns = list(columns) + ["detection_type"]
+    parts = []
+    for df in iter_detection_batches(detections_filename, save_filetype, columns=columns, batch_rows=batch_rows):
+        if detection_type is not None:
+            df = df[df.detection_type == detection_type]
+        parts.append(df)
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts, ignore_index=True)
+
 def run_pipeline_on_video(video_path, resultdir, tag_pixel_diameter=38, cm_per_pixel=1, scale_factor=0.25, recalc=False, 
                           timestamp_format='basler', save_png=False, use_trajectories=True, save_filetype="parquet",
                           create_video=False, use_clahe=True,
                           track_history=0, r_tagged=20, r_untagged=5, show_untagged=False, 
                           detection_ext='-detections', tracks_ext='-tracks',
-                          bee_id_conf_threshold=0.01, detect_conf_threshold=0.01):
-    """Runs detection/tracking pipeline on a single video."""
+                          bee_id_conf_threshold=0.01, detect_conf_threshold=0.01, status_queue=None):
+    """Runs detection/tracking pipeline on a single video. Progress is also put on *status_queue* if given."""
+    from bb_binary.parsing import parse_video_fname
+    from bb_behavior.vis.create_tracking_video import create_tracking_video
 
     st.write(f"Running pipeline on: {video_path}")
     base_name = ".".join(os.path.basename(video_path).split(".")[:-1])
@@ -159,21 +430,44 @@ def run_pipeline_on_video(video_path, resultdir, tag_pixel_diameter=38, cm_per_p
     tracks_filename = os.path.join(resultdir, f"{base_name}{tracks_ext}.{save_filetype}")    
     output_video_filename = os.path.join(resultdir, base_name + "-tracked-video.mp4")
 
+    n_frames = get_video_frame_count(video_path)
+    fps = get_video_fps(video_path)
+
+    # The full resolution video is decoded once, by the detection pass. The same
+    # frames feed the PNG snapshot and a downscaled clip the tracked video is rendered from.
+    snapshot = FirstFrameSnapshot() if save_png else None
+    scaled_clip = None
+    if create_video:
+        scaled_clip_filename = functions_video.scaled_clip_path(video_path, scale_factor)
+        if not os.path.isfile(scaled_clip_filename):
+            scaled_clip = ScaledClipWriter(scaled_clip_filename, fps, scale_factor=scale_factor)
+    frame_consumers = [c for c in (snapshot, scaled_clip) if c is not None]
+    run_detection = recalc or not os.path.isfile(detections_filename)
+
+    # frames done / fps / ETA of the running stages, shown in the GUI or printed when headless.
+    # Without a detection pass, a missing scaled clip is decoded in a stage of its own before rendering.
+    stages = (["detection"] + (["tracking"] if use_trajectories else [])
+              + (["clip"] if scaled_clip is not None and not run_detection else [])
+              + (["video"] if create_video else []))
+    progress = PipelineProgress(os.path.basename(video_path), stages=stages, status_queue=status_queue)
+
     # 1) Load or compute detections
-    if os.path.isfile(detections_filename) and not recalc:
-        st.write(f"Loading existing detections from {detections_filename}")
-        if save_filetype == "csv":
-            video_dataframe = pd.read_csv(detections_filename)
-        else:
-            video_dataframe = pd.read_parquet(detections_filename)
+    if not run_detection:
+        st.write(f"Using existing detections from {detections_filename}")
+        progress.finish_stage("detection")
     else:
         st.write("Running detection pipeline...")
-        decoder_pipeline = build_polo_pipeline() if timestamp_format == "rpi" else None
-        frame_info, video_dataframe = get_detections(video_path, tag_pixel_diameter, use_clahe=use_clahe, decoder_pipeline=decoder_pipeline)
-        if save_filetype == "csv":
-            video_dataframe.to_csv(detections_filename, index=False)
-        else:
-            video_dataframe.to_parquet(detections_filename)
+        decoder_pipeline = build_polo_pipeline() if timestamp_format == "rpi" else build_default_pipeline()
+        timestamps_path = video_path[:-4] + ".txt"
+        timestamps = read_basler_timestamps(timestamps_path) if os.path.isfile(timestamps_path) else None
+        # detections are written window by window, then read back lazily below, only the parts each step needs
+        with open_detection_writer(detections_filename, save_filetype) as writer:
+            detector = DetectionWindowConsumer(writer, tag_pixel_diameter, timestamps=timestamps, fps=fps,
+                                               use_clahe=use_clahe, decoder_pipeline=decoder_pipeline)
+            FrameSource(video_path, [detector] + frame_consumers,
+                        grayscale=True).run(progress=progress.stage("detection", total=n_frames))
+        frame_consumers = []
+        progress.finish_stage("detection")
 
     # 3) Tracking
     if use_trajectories:
@@ -185,11 +479,18 @@ def run_pipeline_on_video(video_path, resultdir, tag_pixel_diameter=38, cm_per_p
                 tracks_df = pd.read_parquet(tracks_filename)
         else:
             st.write("Computing new tracks...")
-            tracks_df = get_tracks(video_dataframe, cm_per_pixel)
+            tagged_dataframe = read_detections(detections_filename, save_filetype, detection_type="TaggedBee")
+            tracks_df = get_tracks(tagged_dataframe, cm_per_pixel,
+                                   progress=progress.stage("tracking", total=tagged_dataframe.frameId.nunique()))
+            del tagged_dataframe
             if save_filetype == "csv":
                 tracks_df.to_csv(tracks_filename, index=False)
             else:
                 tracks_df.to_parquet(tracks_filename)
+            functions_summary.update_summary(resultdir, video_path, tracks_df)
+        if not functions_summary.summary_has_video(resultdir, video_path):
+            functions_summary.update_summary(resultdir, video_path, tracks_df)
+        progress.finish_stage("tracking")
     else:
         tracks_df = None
 
@@ -206,8 +507,9 @@ def run_pipeline_on_video(video_path, resultdir, tag_pixel_diameter=38, cm_per_p
     # 5) create tracked video and/or detection png
     # only include detections dataframe if it is valid to prevent errors
     video_dataframe_input = None
-    if video_dataframe is not None:
-        if show_untagged & (len(video_dataframe)>0):
+    if show_untagged and (save_png or create_video):
+        video_dataframe = read_detections(detections_filename, save_filetype)
+        if len(video_dataframe)>0:
             video_dataframe_input = video_dataframe
     # same for tracks df
     tracks_df_input = None
@@ -215,25 +517,44 @@ def run_pipeline_on_video(video_path, resultdir, tag_pixel_diameter=38, cm_per_p
         if use_trajectories & (len(tracks_df)>0):
             tracks_df_input = tracks_df
 
+    # detections were loaded from disk: decode only what the snapshot and the scaled clip still need
+    if frame_consumers:
+        FrameSource(video_path, frame_consumers,
+                    grayscale=True).run(progress=progress.stage("clip", total=n_frames) if scaled_clip else None)
+
     if save_png:
-        first_frame_image = get_first_frame_from_video(video_path)
-        display_detection_results(first_frame_image, video_dataframe=video_dataframe_input, tracks_df=tracks_df_input, detectionspng_filename=detectionspng_filename)
+        display_detection_results(snapshot.frame, video_dataframe=video_dataframe_input, tracks_df=tracks_df_input, detectionspng_filename=detectionspng_filename)
 
     if create_video:
         st.write("Creating tracked video...")
+        functions_video.evict_preview_cache(functions_video.SCALED_CLIP_CACHE_MAX_BYTES,
+                                            cache_dir=functions_video.SCALED_CLIP_CACHE_DIR, keep=(scaled_clip_filename,))
+        # the clip is already downscaled, so scale the positions instead of the frames
+        scale = scaled_clip.scale if scaled_clip is not None else _clip_scale(video_path, scaled_clip_filename)
+        if tracks_df_input is not None:
+            tracks_df_input = tracks_df_input.assign(x_pixels=tracks_df_input.x_pixels * scale,
+                                                     y_pixels=tracks_df_input.y_pixels * scale)
+        if video_dataframe_input is not None:
+            video_dataframe_input = video_dataframe_input.assign(xpos=video_dataframe_input.xpos * scale,
+                                                                 ypos=video_dataframe_input.ypos * scale)
         create_tracking_video(
-            video_path,
+            scaled_clip_filename,
             output_video_filename,
             video_start_timestamp,
             tracks_df=tracks_df_input,
             track_history=track_history,
             video_dataframe=video_dataframe_input,
-            scale_factor=scale_factor,
+            scale_factor=1.0,
             r_tagged=r_tagged,
             r_untagged=r_untagged,
             bee_id_conf_threshold=bee_id_conf_threshold,
-            detect_conf_threshold=detect_conf_threshold
+            detect_conf_threshold=detect_conf_threshold,
+            # only pass the progress callback to bb_behavior versions that support it
+            **_supported_kwargs(create_tracking_video, progress=progress.stage("video", total=n_frames)),
         )
+        progress.finish_stage("video")
+
+    if create_video:
         st.success(f"Pipeline and video complete! Output: {output_video_filename}")
     else:
         st.success(f"Pipeline complete!")
\ No newline at end of file
@@ -0,0 +1,187 @@
+import streamlit as st
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+########################################################
+# trajectory and density explorer over the tracks files
+########################################################
+
+# frame size of the recordings (pixels), the extent of the density tiles at zoom 0
+DEFAULT_EXTENT = (5312, 4608)
+TILE_BINS = 256               # bins per tile side
+MAX_ZOOM = 5
+EXPLORER_COLUMNS = ["bee_id", "bee_id_confidence", "x_pixels", "y_pixels", "timestamp_posix"]
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _tracks_files_signature(result_dir, tracks_ext="-tracks"):
+    """
+    (path, mtime) of all parquet tracks files; part of every cache key so new
+    results invalidate the caches. Cached for 30 s, so reruns of the app do not
+    glob and stat every tracks file.
+    """
+    files = sorted(glob.glob(os.path.join(result_dir, f"*{tracks_ext}.parquet")))
+    return tuple((f, os.stat(f).st_mtime_ns) for f in files)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_time_range(files_signature):
+    """(min, max) timestamp_posix over all files, from the Parquet column statistics where available."""
+    import pyarrow.parquet as pq
+
+    t_min, t_max = np.inf, -np.inf
+    for path, _ in files_signature:
+        parquet_file = pq.ParquetFile(path)
+        if "timestamp_posix" not in parquet_file.schema_arrow.names:
+            continue
+        column_idx = parquet_file.schema_arrow.get_field_index("timestamp_posix")
+        for rg in range(parquet_file.metadata.num_row_groups):
+            stats = parquet_file.metadata.row_group(rg).column(column_idx).statistics
+            if stats is not None and stats.has_min_max:
+                t_min, t_max = min(t_min, stats.min), max(t_max, stats.max)
+            else:
+                values = parquet_file.read_row_group(rg, columns=["timestamp_posix"]).column(0).to_numpy()
+                if len(values):
+                    t_min, t_max = min(t_min, np.nanmin(values)), max(t_max, np.nanmax(values))
+    if not np.isfinite(t_min):
+        return None
+    return float(t_min), float(t_max)
+
+@st.cache_resource(show_spinner="Loading tracks...", max_entries=4)
+def load_points(files_signature, t_start, t_end, min_confidence=0.0, bee_ids=()):
+    """
+    Load only the columns and rows the explorer needs (time window, confidence
+    and bee_id filters pushed down to the Parquet scan), sorted by bee and time.
+    Held as a cached resource (not copied per rerun), keyed by the filters.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    schema = pa.schema([(c, pa.float64()) for c in EXPLORER_COLUMNS])
+    dataset = ds.dataset([path for path, _ in files_signature], format="parquet", schema=schema)
+    expression = ((ds.field("timestamp_posix") >= t_start) & (ds.field("timestamp_posix") < t_end)
+                  & (ds.field("bee_id_confidence") >= min_confidence))
+    if bee_ids:
+        expression = expression & ds.field("bee_id").isin([float(b) for b in bee_ids])
+    table = dataset.to_table(columns=EXPLORER_COLUMNS, filter=expression)
+    points = {c: table.column(c).to_numpy(zero_copy_only=False) for c in EXPLORER_COLUMNS}
+    order = np.lexsort((points["timestamp_posix"], points["bee_id"]))
+    return {c: v[order] for c, v in points.items()}
+
+def tile_bounds(zoom, tile_x, tile_y, extent=DEFAULT_EXTENT):
+    """Pixel bounds (x0, x1, y0, y1) of tile (tile_x, tile_y) at *zoom* (2**zoom tiles per side)."""
+    n_tiles = 2 ** zoom
+    width, height = extent[0] / n_tiles, extent[1] / n_tiles
+    return tile_x * width, (tile_x + 1) * width, tile_y * height, (tile_y + 1) * height
+
+def _in_bounds(points, bounds):
+    x0, x1, y0, y1 = bounds
+    x, y = points["x_pixels"], points["y_pixels"]
+    return (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def density_tile(files_signature, t_start, t_end, min_confidence, bee_ids, zoom, tile_x, tile_y,
+                 extent=DEFAULT_EXTENT, bins=TILE_BINS):
+    """Detection counts on a bins x bins grid over one tile, binned with a single bincount."""
+    points = load_points(files_signature, t_start, t_end, min_confidence, bee_ids)
+    bounds = tile_bounds(zoom, tile_x, tile_y, extent)
+    mask = _in_bounds(points, bounds)
+    x0, x1, y0, y1 = bounds
+    ix = ((points["x_pixels"][mask] - x0) * (bins / (x1 - x0))).astype(np.int64)
+    iy = ((points["y_pixels"][mask] - y0) * (bins / (y1 - y0))).astype(np.int64)
+    ix, iy = np.minimum(ix, bins - 1), np.minimum(iy, bins - 1)  # float rounding at the upper edge
+    counts = np.bincount(iy * bins + ix, minlength=bins * bins)
+    return counts.reshape(bins, bins)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def decimated_trajectories(files_signature, t_start, t_end, min_confidence, bee_ids, zoom, tile_x, tile_y,
+                           extent=DEFAULT_EXTENT, max_points=20000, max_gap_s=2.0):
+    """
+    Trajectories inside one tile, decimated to at most about *max_points*
+    points by keeping every k-th detection of each bee. Returns x, y arrays
+    with NaN separating bees and gaps longer than *max_gap_s*, ready to plot
+    as a single line.
+    """
+    points = load_points(files_signature, t_start, t_end, min_confidence, bee_ids)
+    mask = _in_bounds(points, tile_bounds(zoom, tile_x, tile_y, extent))
+    n_points = int(mask.sum())
+    if n_points == 0:
+        return np.array([]), np.array([])
+    stride = max(1, int(np.ceil(n_points / max_points)))
+    idx = np.flatnonzero(mask)[::stride]
+    x, y = points["x_pixels"][idx], points["y_pixels"][idx]
+    bee, t = points["bee_id"][idx], points["timestamp_posix"][idx]
+    breaks = np.flatnonzero((np.diff(bee) != 0) | (np.diff(t) > max_gap_s * stride)) + 1
+    return np.insert(x, breaks, np.nan), np.insert(y, breaks, np.nan)
+
+def _density_image(counts):
+    import matplotlib
+    values = np.log1p(counts.astype(float))
+    if values.max() > 0:
+        values /= values.max()
+    return (matplotlib.colormaps["inferno"](values)[..., :3] * 255).astype(np.uint8)
+
+def show_explorer_panel(result_dir, tracks_ext="-tracks", extent=DEFAULT_EXTENT):
+    """Streamlit panel with a density heatmap and decimated trajectories over the tracks files."""
+    files_signature = _tracks_files_signature(result_dir, tracks_ext)
+    if not files_signature:
+        st.info("No parquet tracks files found in the output directory.")
+        return
+    time_range = get_time_range(files_signature)
+    if time_range is None:
+        st.info("The tracks files contain no detections.")
+        return
+
+    first = pd.Timestamp(time_range[0], unit="s", tz="UTC")
+    last = pd.Timestamp(time_range[1], unit="s", tz="UTC")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        start_day = st.date_input("Start day", value=first.date(), min_value=first.date(), max_value=last.date(),
+                                  key="explorer_day")
+    with col2:
+        start_hour = st.number_input("Start hour (UTC)", min_value=0, max_value=23, value=first.hour, key="explorer_hour")
+    with col3:
+        window_hours = st.number_input("Window (hours)", min_value=0.25, max_value=24.0 * 31, value=1.0,
+                                       key="explorer_window")
+    with col4:
+        min_confidence = st.number_input("Min. ID confidence", min_value=0.0, max_value=1.0, value=0.5,
+                                         key="explorer_conf")
+    bee_ids_text = st.text_input("bee_ids (comma separated, empty for all)", value="", key="explorer_bees")
+    try:
+        bee_ids = tuple(sorted(int(b) for b in bee_ids_text.replace(";", ",").split(",") if b.strip()))
+    except ValueError:
+        st.error("bee_ids must be integers.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        zoom = st.slider("Zoom", min_value=0, max_value=MAX_ZOOM, value=0, key="explorer_zoom")
+    n_tiles = 2 ** zoom
+    with col2:
+        tile_x = st.slider("Tile x", min_value=0, max_value=n_tiles - 1, value=0, key="explorer_tx") if n_tiles > 1 else 0
+    with col3:
+        tile_y = st.slider("Tile y", min_value=0, max_value=n_tiles - 1, value=0, key="explorer_ty") if n_tiles > 1 else 0
+
+    t_start = pd.Timestamp(start_day, tz="UTC") + pd.Timedelta(hours=int(start_hour))
+    t_end = t_start + pd.Timedelta(hours=float(window_hours))
+    query = (files_signature, t_start.timestamp(), t_end.timestamp(), float(min_confidence), bee_ids,
+             zoom, tile_x, tile_y, tuple(extent))
+
+    counts = density_tile(*query)
+    st.write(f"{int(counts.sum())} detections in view")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.image(_density_image(counts), caption="Detection density (log scale)")
+    with col2:
+        import matplotlib.pyplot as plt
+        x, y = decimated_trajectories(*query)
+        x0, x1, y0, y1 = tile_bounds(zoom, tile_x, tile_y, extent)
+        fig, ax = plt.subplots(figsize=(6, 6 * (y1 - y0) / (x1 - x0)))
+        ax.plot(x, y, lw=0.5, alpha=0.6)
+        ax.set_xlim(x0, x1)
+        ax.set_ylim(y1, y0)  # image coordinates
+        ax.set_aspect("equal")
+        ax.set_title("Trajectories (decimated)")
+        st.pyplot(fig)
+        plt.close(fig)
@@ -0,0 +1,206 @@
+import streamlit as st
+import glob
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+########################################################
+# low-overhead live view of the segment being recorded
+########################################################
+
+LIVEVIEW_MIN_INTERVAL_S = 10     # at most one keyframe decode per interval
+LIVEVIEW_DETECTION_INTERVAL_S = 60
+LIVEVIEW_HEIGHT = 480
+LIVEVIEW_TIMEOUT_S = 15
+SEGMENT_EXTENSIONS = (".mp4", ".h264")
+# containers with an index ffmpeg can seek from the end with; raw .h264 has none
+SEEKABLE_EXTENSIONS = (".mp4",)
+
+def latest_segments(tmp_dir, cam):
+    """Video segments in *tmp_dir*/*cam*, newest (the one being written) first."""
+    files = [f for ext in SEGMENT_EXTENSIONS for f in glob.glob(os.path.join(tmp_dir, cam, f"*{ext}"))]
+    return sorted(files, key=os.path.getmtime, reverse=True)
+
+def _low_priority_cmd(cmd):
+    # lowest CPU priority and idle I/O scheduling class, so decoding never competes with recording.
+    # Prefixed commands instead of a preexec_fn, which is not safe in the threaded Streamlit server.
+    if shutil.which("ionice"):
+        cmd = ["ionice", "-c3"] + cmd
+    if shutil.which("nice"):
+        cmd = ["nice", "-n", "19"] + cmd
+    return cmd
+
+def _frame_size(video_path):
+    """(width, height) of *video_path* from its metadata using OpenCV, None if unknown."""
+    import cv2
+    if os.path.getsize(video_path) == 0:
+        return None  # segment just created
+    cap = cv2.VideoCapture(video_path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    if width > 0 and height > 0:
+        return width, height
+    return None
+
+def grab_latest_keyframe(video_path, height=LIVEVIEW_HEIGHT, grayscale=False, seek_from_end_s=5,
+                         timeout_s=LIVEVIEW_TIMEOUT_S):
+    """
+    Decode only the last keyframe of *video_path* (scaled to *height*, full
+    resolution if None) with a single low-priority ffmpeg thread.
+    Returns a BGR image, or with *grayscale* a single channel image piped from
+    ffmpeg as raw pixels (no PNG encoding), or None.
+    """
+    import cv2
+
+    scale = ["-vf", f"scale=-2:{height}"] if height else []
+    output = ["-f", "image2pipe", "-c:v", "png", "-"]
+    if grayscale:
+        size = _frame_size(video_path)
+        if size is None:
+            return None
+        width, out_height = size
+        if height:
+            width, out_height = int(width * height / out_height) // 2 * 2, height
+            scale = ["-vf", f"scale={width}:{out_height}"]
+        output = ["-f", "rawvideo", "-pix_fmt", "gray", "-"]
+
+    # walk the keyframes only and keep the last one
+    attempts = [["-skip_frame", "nokey", "-i", video_path] + scale]
+    if video_path.lower().endswith(SEEKABLE_EXTENSIONS):
+        # seek close to the end and take the first keyframe after it. Only for containers with an
+        # index: on raw .h264 -sseof is silently ignored and the first frame of the segment is returned
+        attempts.insert(0, ["-skip_frame", "nokey", "-sseof", f"-{seek_from_end_s}", "-i", video_path]
+                        + scale + ["-frames:v", "1"])
+    for args in attempts:
+        cmd = _low_priority_cmd(["ffmpeg", "-loglevel", "error", "-threads", "1", "-y"] + args + output)
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout_s)
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            continue
+        if result.returncode != 0 or not result.stdout:
+            continue
+        # walking the keyframes writes several frames to the pipe, keep the last one
+        data = result.stdout
+        if grayscale:
+            n_bytes = width * out_height
+            if len(data) >= n_bytes:
+                return np.frombuffer(data[-n_bytes:], np.uint8).reshape(out_height, width)
+        else:
+            last_png = data.rfind(b"\x89PNG")
+            image = cv2.imdecode(np.frombuffer(data[last_png:], np.uint8), cv2.IMREAD_COLOR)
+            if image is not None:
+                return image
+    return None
+
+def draw_detections(image, video_dataframe, scale):
+    """Draw detections (full resolution coordinates) onto a downscaled BGR image."""
+    import cv2
+    image = image.copy()
+    for x, y, detection_type in video_dataframe[["xpos", "ypos", "detection_type"]].itertuples(index=False):
+        color = (0, 255, 255) if detection_type == "TaggedBee" else (255, 128, 0)
+        cv2.circle(image, (int(x * scale), int(y * scale)), 6, color, 1, cv2.LINE_AA)
+    return image
+
+class LiveView:
+    """
+    Periodically decodes the latest keyframe of the segment being recorded.
+
+    Decoding runs in a background thread and at most once per *min_interval_s*;
+    callers always get the last result immediately and never wait for ffmpeg.
+    One instance is shared by all browser sessions, so several open tabs do not
+    multiply the cost.
+    """
+
+    def __init__(self, tmp_dir, cam):
+        self.tmp_dir = tmp_dir
+        self.cam = cam
+        self.image = None
+        self.segment = None
+        self.grabbed_at = None
+        self.decode_s = None
+        self.detections = None
+        self.detections_scale = 1.0
+        self.detected_at = None
+        self.error = None
+        self._busy = threading.Lock()
+        self._last_start = 0.0
+
+    def refresh(self, min_interval_s=LIVEVIEW_MIN_INTERVAL_S, height=LIVEVIEW_HEIGHT, detect=False,
+                detection_interval_s=LIVEVIEW_DETECTION_INTERVAL_S, tag_pixel_diameter=45):
+        """Start a background decode if the last one is older than *min_interval_s* and none is running."""
+        now = time.monotonic()
+        if now - self._last_start < min_interval_s or not self._busy.acquire(blocking=False):
+            return
+        self._last_start = now
+        run_detection = detect and (self.detected_at is None or time.time() - self.detected_at >= detection_interval_s)
+        threading.Thread(target=self._refresh, args=(height, run_detection, tag_pixel_diameter), daemon=True).start()
+
+    def _refresh(self, height, run_detection, tag_pixel_diameter):
+        try:
+            t = time.perf_counter()
+            for segment in latest_segments(self.tmp_dir, self.cam)[:2]:
+                # the newest segment may not be decodable yet, fall back to the previous one
+                image = grab_latest_keyframe(segment, height=height)
+                if image is not None:
+                    self.image, self.segment, self.grabbed_at = image, segment, time.time()
+                    self.decode_s = time.perf_counter() - t
+                    self.error = None
+                    break
+            else:
+                self.error = "No decodable segment found yet."
+                return
+            if run_detection:
+                import functions_data_and_pipeline
+                full_frame = grab_latest_keyframe(self.segment, height=None, grayscale=True)
+                if full_frame is not None:
+                    self.detections = functions_data_and_pipeline.detect_markers_in_frames(
+                        [full_frame], tag_pixel_diameter,
+                        decoder_pipeline=functions_data_and_pipeline.build_default_pipeline())
+                    self.detections_scale = self.image.shape[0] / full_frame.shape[0]
+                    self.detected_at = time.time()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self._busy.release()
+
+@st.cache_resource
+def get_live_view(tmp_dir, cam):
+    return LiveView(tmp_dir, cam)
+
+def show_live_view(tmp_dir, cam):
+    """Streamlit panel showing the latest keyframe of the recording, refreshed in a fragment."""
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        interval_s = st.number_input("Refresh every (s)", min_value=2, max_value=600, value=LIVEVIEW_MIN_INTERVAL_S,
+                                     key="liveview_interval")
+    with col2:
+        height = st.selectbox("Resolution", [240, 480, 960], index=1, key="liveview_height")
+    with col3:
+        overlay = st.checkbox("Detection overlay", value=False, key="liveview_overlay",
+                              help=f"Runs the detection on one full resolution keyframe "
+                                   f"at most every {LIVEVIEW_DETECTION_INTERVAL_S} s")
+    with col4:
+        tag_pixel_diameter = st.number_input("tag_pixel_diameter", min_value=1.0, max_value=999.0, value=45.0,
+                                             key="liveview_tag_diameter")
+    live_view = get_live_view(tmp_dir, cam)
+
+    @st.fragment(run_every=interval_s)
+    def _live_view_fragment():
+        live_view.refresh(min_interval_s=interval_s, height=height, detect=overlay, tag_pixel_diameter=tag_pixel_diameter)
+        if live_view.image is None:
+            st.info(live_view.error or "Waiting for the first keyframe...")
+            return
+        image = live_view.image
+        if overlay and live_view.detections is not None and len(live_view.detections) > 0:
+            image = draw_detections(image, live_view.detections, live_view.detections_scale)
+        age = time.time() - live_view.grabbed_at
+        st.image(image, channels="BGR",
+                 caption=f"{os.path.basename(live_view.segment)}, {age:.0f} s ago, decoded in {live_view.decode_s:.2f} s")
+        if live_view.error:
+            st.warning(live_view.error)
+
+    _live_view_fragment()
@@ -0,0 +1,220 @@
+import streamlit as st
+import collections
+import threading
+import time
+
+import functions_liveview
+
+########################################################
+# near-real-time detection monitoring during acquisition
+########################################################
+
+MONITOR_SAMPLE_INTERVAL_S = 5    # try to sample a new frame this often
+MONITOR_TIME_BUDGET_S = 10       # detections slower than this are counted as late
+MONITOR_WINDOW_S = 300           # rolling window of the published counts
+MONITOR_ID_CONFIDENCE = 0.5      # decoded IDs below this confidence are not counted
+MONITOR_MIN_CROP = 0.05          # smallest fraction of the frame area detected to stay within the budget
+
+class DetectionMonitor:
+    """
+    Samples the newest keyframe of the segment being recorded and runs the
+    detection on it, in one background thread.
+
+    There is never more than one detection in flight and samples are never
+    queued: if the previous detection is still running when the next sample
+    is due, that sample is dropped. When load spikes, the monitor skips frames
+    rather than falling behind the recording. Detections that take longer than
+    *time_budget_s* are counted as late, and the following samples only detect
+    on a central crop of the frame, sized from the last latency so that the
+    detection fits the budget again; the crop grows back once there is headroom.
+    """
+
+    def __init__(self, tmp_dir, cam, tag_pixel_diameter=45, use_clahe=True,
+                 sample_interval_s=MONITOR_SAMPLE_INTERVAL_S, time_budget_s=MONITOR_TIME_BUDGET_S,
+                 window_s=MONITOR_WINDOW_S, id_confidence=MONITOR_ID_CONFIDENCE):
+        self.tmp_dir = tmp_dir
+        self.cam = cam
+        self.tag_pixel_diameter = tag_pixel_diameter
+        self.use_clahe = use_clahe
+        self.sample_interval_s = sample_interval_s
+        self.time_budget_s = time_budget_s
+        self.window_s = window_s
+        self.id_confidence = id_confidence
+        self.samples = collections.deque()  # (time, n_tagged, n_untagged, decoded ids, crop fraction)
+        self.n_processed = 0
+        self.n_dropped = 0
+        self.n_late = 0
+        self.last_latency_s = None
+        self.crop_fraction = 1.0  # fraction of the frame area the detection runs on
+        self.last_sample_at = None
+        self.error = None
+        self._samples_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._busy = threading.Lock()
+        self._last_key = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now < next_sample:
+                self._stop.wait(next_sample - now)
+                continue
+            next_sample = now + max(self.sample_interval_s, self.last_latency_s or 0)
+            if not self._busy.acquire(blocking=False):
+                self.n_dropped += 1  # previous detection still running: drop instead of queueing
+                continue
+            threading.Thread(target=self._detect_latest, daemon=True).start()
+
+    def _detect_latest(self):
+        import functions_data_and_pipeline
+
+        try:
+            segments = functions_liveview.latest_segments(self.tmp_dir, self.cam)
+            if not segments:
+                return
+            # the newest segment may not have a decodable keyframe yet (e.g. right after a rollover)
+            for segment in segments[:2]:
+                frame = functions_liveview.grab_latest_keyframe(segment, height=None, grayscale=True)
+                if frame is not None:
+                    break
+            else:
+                self.n_dropped += 1
+                self.error = "No decodable keyframe in the latest segments."
+                return
+            key = (segment, frame[::64, ::64].tobytes())
+            if key == self._last_key:
+                return  # no new keyframe since the last sample
+            self._last_key = key
+
+            crop_fraction = self.crop_fraction
+            decoder_pipeline = functions_data_and_pipeline.build_default_pipeline()
+            # time only the detection, not the wait for a pipeline run holding the lock
+            with functions_data_and_pipeline.FRAME_DETECTION_LOCK:
+                t = time.perf_counter()
+                video_dataframe = functions_data_and_pipeline.detect_markers_in_frames(
+                    [center_crop(frame, crop_fraction)], self.tag_pixel_diameter, use_clahe=self.use_clahe,
+                    decoder_pipeline=decoder_pipeline)
+                latency = time.perf_counter() - t
+            # detection time scales with the area: size the next crop to fit the budget, with some margin
+            self.crop_fraction = min(1.0, max(MONITOR_MIN_CROP,
+                                              crop_fraction * min(0.9 * self.time_budget_s / max(latency, 1e-3), 2.0)))
+
+            tagged = video_dataframe[video_dataframe.detection_type == "TaggedBee"]
+            ids = set(tagged.beeID[tagged.confidence >= self.id_confidence].astype(str)) if len(tagged) else set()
+            self._publish(len(tagged), len(video_dataframe) - len(tagged), ids, latency, crop_fraction)
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self._busy.release()
+
+    def _publish(self, n_tagged, n_untagged, ids, latency, crop_fraction=1.0):
+        now = time.time()
+        with self._samples_lock:
+            self.samples.append((now, n_tagged, n_untagged, ids, crop_fraction))
+            while self.samples and self.samples[0][0] < now - self.window_s:
+                self.samples.popleft()
+        self.n_processed += 1
+        self.last_latency_s = latency
+        self.last_sample_at = now
+        if latency > self.time_budget_s:
+            self.n_late += 1
+
+    def status(self):
+        """Rolling counts over the last *window_s* seconds, per-frame counts scaled from the crop to the full frame."""
+        with self._samples_lock:
+            samples = list(self.samples)
+        ids = set().union(*(s[3] for s in samples)) if samples else set()
+        return {
+            "running": self.running,
+            "frames_in_window": len(samples),
+            "tagged_last_frame": samples[-1][1] if samples else None,
+            "tagged_per_frame": sum(s[1] / s[4] for s in samples) / len(samples) if samples else None,
+            "untagged_per_frame": sum(s[2] / s[4] for s in samples) / len(samples) if samples else None,
+            "min_crop_in_window": min(s[4] for s in samples) if samples else 1.0,
+            "decoded_ids_in_window": len(ids),
+            "last_latency_s": self.last_latency_s,
+            "crop_fraction": self.crop_fraction,
+            "last_sample_age_s": time.time() - self.last_sample_at if self.last_sample_at else None,
+            "processed": self.n_processed,
+            "dropped": self.n_dropped,
+            "late": self.n_late,
+            "error": self.error,
+        }
+
+def center_crop(frame, area_fraction):
+    """Central part of *frame* covering *area_fraction* of its area (same aspect ratio)."""
+    if area_fraction >= 1.0:
+        return frame
+    height, width = frame.shape[:2]
+    side = area_fraction ** 0.5
+    h, w = max(1, int(height * side)), max(1, int(width * side))
+    y0, x0 = (height - h) // 2, (width - w) // 2
+    return frame[y0:y0 + h, x0:x0 + w]
+
+@st.cache_resource
+def get_monitor(tmp_dir, cam):
+    """One monitor per camera, shared by all browser sessions."""
+    return DetectionMonitor(tmp_dir, cam)
+
+def stop_monitor(tmp_dir, cam):
+    get_monitor(tmp_dir, cam).stop()
+
+def show_monitor_panel(tmp_dir, cam, refresh_s=2):
+    """Start/stop controls and rolling detection counts, refreshed in a fragment."""
+    monitor = get_monitor(tmp_dir, cam)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        monitor.tag_pixel_diameter = st.number_input("tag_pixel_diameter", min_value=1.0, max_value=999.0,
+                                                     value=float(monitor.tag_pixel_diameter), key="monitor_tag_diameter")
+    with col2:
+        monitor.sample_interval_s = st.number_input("Sample every (s)", min_value=1, max_value=600,
+                                                    value=int(monitor.sample_interval_s), key="monitor_interval")
+    with col3:
+        monitor.time_budget_s = st.number_input("Time budget (s)", min_value=1, max_value=600,
+                                                value=int(monitor.time_budget_s), key="monitor_budget")
+    if not monitor.running:
+        if st.button("Start Detection Monitor", key="monitor_start_btn"):
+            monitor.start()
+            st.rerun()
+        return
+    if st.button("Stop Detection Monitor", key="monitor_stop_btn"):
+        monitor.stop()
+        st.rerun()
+
+    @st.fragment(run_every=refresh_s)
+    def _monitor_fragment():
+        status = monitor.status()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Tagged (last frame)", "-" if status["tagged_last_frame"] is None else status["tagged_last_frame"])
+        col2.metric(f"Tagged / frame ({MONITOR_WINDOW_S // 60} min)",
+                    "-" if status["tagged_per_frame"] is None else f"{status['tagged_per_frame']:.1f}")
+        col3.metric(f"Decoded IDs ({MONITOR_WINDOW_S // 60} min)", status["decoded_ids_in_window"])
+        col4.metric("Detection latency", "-" if status["last_latency_s"] is None else f"{status['last_latency_s']:.1f} s")
+        age = "-" if status["last_sample_age_s"] is None else f"{status['last_sample_age_s']:.0f} s ago"
+        st.caption(f"Last sample {age}; {status['processed']} frames processed, "
+                   f"{status['dropped']} dropped, {status['late']} over the time budget")
+        if status["crop_fraction"] < 1.0 or status["min_crop_in_window"] < 1.0:
+            st.caption(f"Detecting on the central {100 * status['crop_fraction']:.0f}% of the frame "
+                       f"to stay within the time budget. Tags per frame are scaled to the full frame; "
+                       f"the last frame and decoded ID counts cover only the cropped area.")
+        if status["error"]:
+            st.warning(status["error"])
+
+    _monitor_fragment()
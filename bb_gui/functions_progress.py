@@ -0,0 +1,198 @@
+import streamlit as st
+import time
+
+########################################################
+# progress / ETA reporting for pipeline runs
+########################################################
+
+# Relative share of the total run time of each stage, used for the overall percentage.
+STAGE_WEIGHTS = {"detection": 0.6, "tracking": 0.1, "clip": 0.2, "video": 0.3}
+
+def _in_streamlit() -> bool:
+    """True if we are running inside a Streamlit script run (not headless)."""
+    try:
+        return st.runtime.exists()
+    except Exception:
+        return False
+
+def _format_eta(seconds) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+def format_status(s) -> str:
+    """One line summary of a PipelineProgress ``status`` dict."""
+    if s["stage"] is None:
+        return f"{s['video']}: starting"
+    frames = f"{s['frames_done']}" + (f"/{s['frames_total']}" if s["frames_total"] else "")
+    stage_pct = "?" if s["stage_fraction"] is None else f"{100 * s['stage_fraction']:.0f}%"
+    fps = "?" if not s["fps"] else f"{s['fps']:.1f}"
+    return (f"{s['video']}: {s['stage']} {stage_pct} ({frames} frames, {fps} fps, "
+            f"ETA {_format_eta(s['eta_s'])}) | overall {100 * s['overall_fraction']:.0f}%")
+
+class StageProgress:
+    """
+    tqdm-compatible progress object for a single stage.
+
+    Can wrap an iterable (``for frame in progress(frames, total=n)``) or be
+    updated manually (``progress.update(1)``), so it can be passed as the
+    ``progress`` argument of bb_behavior functions.
+    Counting a frame is a single integer increment; the clock is only read
+    every ``batch_size`` frames and the report is only emitted every
+    ``min_interval`` seconds, so it does not slow down the frame loop.
+    """
+
+    def __init__(self, reporter, name, iterable=None, total=None):
+        self.reporter = reporter
+        self.name = name
+        self.iterable = iterable
+        self.total = total
+        if self.total is None and iterable is not None and hasattr(iterable, "__len__"):
+            self.total = len(iterable)
+        self.n = 0
+        self.start_time = time.monotonic()
+        self._next_check = reporter.batch_size
+
+    def __iter__(self):
+        for item in self.iterable:
+            yield item
+            self.update(1)
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.total or 0
+
+    def update(self, n=1):
+        self.n += n
+        if self.n >= self._next_check:
+            self._next_check = self.n + self.reporter.batch_size
+            self.reporter.maybe_emit()
+
+    def set_description(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        self.reporter.finish_stage(self.name)
+
+    @property
+    def fps(self):
+        elapsed = time.monotonic() - self.start_time
+        return self.n / elapsed if elapsed > 0 else None
+
+    @property
+    def fraction(self):
+        if not self.total:
+            return None
+        return min(self.n / self.total, 1.0)
+
+    @property
+    def eta(self):
+        fps = self.fps
+        if not self.total or not fps:
+            return None
+        return max(self.total - self.n, 0) / fps
+
+class PipelineProgress:
+    """
+    Collects the per-frame progress of the pipeline stages of one video and
+    reports frames done, current fps, ETA and per-stage/overall percentage.
+
+    Inside Streamlit the report is shown in a progress bar, in headless runs
+    it is printed to stdout. The latest report is always available as
+    ``status`` (a dict) for other consumers, and is also put on
+    *status_queue* if given (e.g. by a worker process reporting to the GUI).
+    """
+
+    def __init__(self, video_name, stages=("detection", "tracking", "video"), min_interval=1.0, batch_size=10,
+                 status_queue=None):
+        self.video_name = video_name
+        self.stages = list(stages)
+        self.min_interval = min_interval
+        self.batch_size = batch_size
+        self.status_queue = status_queue
+        self.current = None
+        self.done = set()
+        self.status = {}
+        self._last_emit = 0.0
+        self._bar = None
+        self._text = None
+        if _in_streamlit():
+            self._text = st.empty()
+            self._bar = st.progress(0.0)
+
+    def stage(self, name, total=None):
+        """Start stage *name* and return a tqdm-like callable to pass as ``progress``."""
+        default_total = total
+
+        def progress(iterable=None, total=None, desc=None, **kwargs):
+            if total is None:
+                total = default_total
+            self.current = StageProgress(self, name, iterable=iterable, total=total)
+            self.emit()
+            return self.current
+        self.current = StageProgress(self, name, total=total)
+        self.emit()
+        return progress
+
+    def finish_stage(self, name):
+        if name in self.done:
+            return
+        self.done.add(name)
+        self.emit()
+
+    def overall_fraction(self):
+        weights = {s: STAGE_WEIGHTS.get(s, 1.0) for s in self.stages}
+        total_weight = sum(weights.values()) or 1.0
+        done = sum(weights[s] for s in self.stages if s in self.done)
+        if self.current is not None and self.current.name not in self.done:
+            done += weights.get(self.current.name, 0.0) * (self.current.fraction or 0.0)
+        return min(done / total_weight, 1.0)
+
+    def maybe_emit(self):
+        now = time.monotonic()
+        if now - self._last_emit >= self.min_interval:
+            self.emit(now)
+
+    def emit(self, now=None):
+        self._last_emit = now if now is not None else time.monotonic()
+        stage = self.current
+        if stage is None:
+            self.status = {"video": self.video_name, "stage": None, "frames_done": 0, "frames_total": None,
+                           "fps": None, "eta_s": None, "stage_fraction": None,
+                           "overall_fraction": self.overall_fraction()}
+        else:
+            self.status = {
+                "video": self.video_name,
+                "stage": stage.name,
+                "frames_done": stage.n,
+                "frames_total": stage.total,
+                "fps": stage.fps,
+                "eta_s": 0.0 if stage.name in self.done else stage.eta,
+                "stage_fraction": 1.0 if stage.name in self.done else stage.fraction,
+                "overall_fraction": self.overall_fraction(),
+            }
+        message = self.format_status()
+        if self.status_queue is not None:
+            try:
+                self.status_queue.put_nowait(dict(self.status))
+            except Exception:
+                pass  # the GUI only needs the latest status, never block the frame loop
+        if self._bar is not None:
+            try:
+                self._bar.progress(self.status["overall_fraction"])
+                self._text.write(message)
+            except Exception:
+                pass  # called from a thread without script context
+        else:
+            print(f"[INFO] {message}", flush=True)
+
+    def format_status(self):
+        return format_status(self.status)
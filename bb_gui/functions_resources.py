@@ -0,0 +1,226 @@
+import streamlit as st
+import glob
+import os
+import subprocess
+import sys
+import time
+
+########################################################
+# CPU resource governor for concurrent pipeline jobs
+########################################################
+
+# Thread pool sizes read by BLAS, TensorFlow, joblib/loky and OpenCV at import time.
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "LOKY_MAX_CPU_COUNT",
+    "OPENCV_FOR_THREADS_NUM",
+]
+
+PINNING_OPTIONS = ["none", "cores", "numa"]
+
+def available_cpus():
+    """CPUs this process may run on (respects taskset/cgroup affinity)."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return list(range(os.cpu_count() or 1))
+
+def _parse_cpulist(text):
+    """Parse a kernel cpulist like '0-3,8-11' into a list of CPU ids."""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def numa_nodes():
+    """Return {node_id: [cpus]} restricted to the available CPUs; a single node if unknown."""
+    allowed = set(available_cpus())
+    nodes = {}
+    for path in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        node_id = int(os.path.basename(os.path.dirname(path))[len("node"):])
+        with open(path, "r") as f:
+            cpus = [c for c in _parse_cpulist(f.read()) if c in allowed]
+        if cpus:
+            nodes[node_id] = cpus
+    return nodes or {0: sorted(allowed)}
+
+def _split(cpus, n_parts):
+    """Split *cpus* into *n_parts* contiguous, nearly equal chunks."""
+    size, extra = divmod(len(cpus), n_parts)
+    chunks, start = [], 0
+    for i in range(n_parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(cpus[start:end])
+        start = end
+    return chunks
+
+def plan_workers(n_jobs, threads_per_job=None, pinning="none"):
+    """
+    Split the available cores between *n_jobs* concurrent pipeline workers.
+
+    Returns one dict per worker with the CPUs it may use (``cpus``, None if
+    not pinned) and its thread pool size (``threads``). Without an explicit
+    *threads_per_job* every worker gets its share of the cores. With
+    ``pinning="numa"`` workers are spread round-robin over the NUMA nodes and
+    only use cores of their node.
+    """
+    cpus = available_cpus()
+    n_jobs = max(1, min(int(n_jobs), len(cpus)))
+
+    if pinning == "numa":
+        nodes = list(numa_nodes().values())
+        jobs_per_node = _split(list(range(n_jobs)), min(len(nodes), n_jobs))
+        core_sets = []
+        for node_cpus, jobs in zip(nodes, jobs_per_node):
+            core_sets.extend(_split(node_cpus, len(jobs)))
+    else:
+        core_sets = _split(cpus, n_jobs)
+
+    workers = []
+    for core_set in core_sets:
+        threads = int(threads_per_job) if threads_per_job else max(1, len(core_set))
+        workers.append({"cpus": core_set if pinning != "none" else None, "threads": threads})
+    return workers
+
+def thread_limit_env(threads):
+    """Environment variables limiting all known thread pools to *threads*."""
+    env = {name: str(threads) for name in THREAD_ENV_VARS}
+    env["TF_NUM_INTEROP_THREADS"] = str(max(1, threads // 2))
+    return env
+
+def apply_worker_limits(worker):
+    """
+    Apply the thread limits and CPU pinning of *worker* to the current process.
+    Must run before TensorFlow/PyTorch are imported for the env variables to take effect.
+    """
+    os.environ.update(thread_limit_env(worker["threads"]))
+    if worker.get("cpus"):
+        try:
+            os.sched_setaffinity(0, worker["cpus"])
+        except (AttributeError, OSError) as e:
+            print(f"[ERROR] Could not pin worker to CPUs {worker['cpus']}: {e}")
+    try:
+        import cv2
+        cv2.setNumThreads(worker["threads"])
+    except ImportError:
+        pass
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(worker["threads"])
+
+########################################################
+# calibration for the auto mode
+########################################################
+
+_CALIBRATION_SNIPPET = """
+import time, numpy as np, cv2
+cv2.setNumThreads({threads})
+a = np.random.rand(1024, 1024).astype(np.float32)
+img = (np.random.rand(2048, 2048) * 255).astype(np.uint8)
+t = time.perf_counter()
+for _ in range(3):
+    a @ a
+    cv2.GaussianBlur(img, (31, 31), 0)
+print(time.perf_counter() - t)
+"""
+
+def _time_workload(threads):
+    env = dict(os.environ, **thread_limit_env(threads))
+    out = subprocess.run([sys.executable, "-c", _CALIBRATION_SNIPPET.format(threads=threads)],
+                         env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def calibrate(min_efficiency=0.6):
+    """
+    Time a short BLAS + OpenCV workload with increasing thread counts and
+    return a worker plan: the largest thread count whose parallel efficiency
+    (speedup / threads) is still above *min_efficiency*, and as many
+    concurrent jobs as fit on the available cores with that many threads.
+    """
+    n_cpus = len(available_cpus())
+    candidates = sorted({1, 2, 4, 8, 16, n_cpus} & set(range(1, n_cpus + 1)))
+    t_single = _time_workload(1)
+    threads_per_job = 1
+    timings = {1: t_single}
+    for threads in candidates[1:]:
+        timings[threads] = _time_workload(threads)
+        if t_single / timings[threads] / threads >= min_efficiency:
+            threads_per_job = threads
+    return {"n_jobs": max(1, n_cpus // threads_per_job), "threads_per_job": threads_per_job, "timings": timings}
+
+@st.cache_resource(show_spinner="Calibrating CPU thread limits...")
+def get_calibration():
+    """Calibration result, computed once per server process."""
+    t = time.perf_counter()
+    result = calibrate()
+    result["duration_s"] = time.perf_counter() - t
+    return result
+
+########################################################
+# running pipeline jobs in governed worker processes
+########################################################
+
+# set in each worker process by _init_worker
+_status_queue = None
+
+def _init_worker(worker_queue, status_queue):
+    global _status_queue
+    _status_queue = status_queue
+    apply_worker_limits(worker_queue.get())
+
+def _run_pipeline_job(video_path, resultdir, pipeline_params):
+    import functions_data_and_pipeline
+    functions_data_and_pipeline.run_pipeline_on_video(video_path, resultdir, status_queue=_status_queue, **pipeline_params)
+    return video_path
+
+def _drain(status_queue, on_status):
+    import queue
+    while True:
+        try:
+            status = status_queue.get_nowait()
+        except queue.Empty:
+            return
+        if on_status is not None:
+            on_status(status)
+
+def run_pipeline_jobs(video_paths, resultdir, workers, on_status=None, poll_interval=0.5, **pipeline_params):
+    """
+    Run the pipeline on *video_paths* in one process per entry of *workers*
+    (see ``plan_workers``), each with its own thread limits and core set.
+    Yields (video_path, error) as the jobs finish; error is None on success.
+
+    The workers report their PipelineProgress status through a queue;
+    *on_status* is called with every status dict from this (the calling)
+    thread, at least every *poll_interval* seconds while jobs are running.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    # spawn, so that every worker imports TF/PyTorch fresh with its own limits
+    ctx = multiprocessing.get_context("spawn")
+    worker_queue = ctx.Queue()
+    for worker in workers:
+        worker_queue.put(worker)
+    status_queue = ctx.Queue()
+
+    with ProcessPoolExecutor(max_workers=len(workers), mp_context=ctx,
+                             initializer=_init_worker, initargs=(worker_queue, status_queue)) as executor:
+        futures = {executor.submit(_run_pipeline_job, video_path, resultdir, pipeline_params): video_path
+                   for video_path in video_paths}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            _drain(status_queue, on_status)
+            for future in done:
+                yield futures[future], future.exception()
+        _drain(status_queue, on_status)
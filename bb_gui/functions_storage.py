@@ -0,0 +1,320 @@
+import streamlit as st
+import glob
+import os
+import shutil
+import threading
+import time
+
+import functions_video
+
+########################################################
+# disk space watermarks and tiered retention
+########################################################
+
+DEFAULT_HIGH_WATERMARK = 0.90  # start freeing space above this used fraction of a volume ...
+DEFAULT_LOW_WATERMARK = 0.80   # ... and stop once usage is below this
+TEMP_FILE_MIN_AGE_S = 3600     # leftover temp files younger than this may still be in use
+STORAGE_CHECK_INTERVAL_S = 60  # how often the watermarks are enforced while recording
+
+# Retention tiers in the order they are deleted from when a volume is above the high watermark.
+RETENTION_TIERS = ["temp", "rendered", "previews", "raw"]
+TIER_DESCRIPTIONS = {
+    "temp": "leftover remux and partially written files",
+    "rendered": "rendered -tracked-video.mp4 outputs",
+    "previews": "cached preview proxies, sample clips and downscaled render clips",
+    "raw": "raw segments that are processed and archived",
+}
+
+RAW_VIDEO_EXTENSIONS = (".mp4", ".avi", ".h264")
+
+def _existing_parent(path):
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    return path
+
+def volume_id(path):
+    """Device id of the volume *path* (or its nearest existing parent) lives on."""
+    return os.stat(_existing_parent(path)).st_dev
+
+def volume_usage(path):
+    """Return (total, used, free) bytes of the volume holding *path*."""
+    return shutil.disk_usage(_existing_parent(path))
+
+def _volume_watermarks(device, watermarks, high_watermark, low_watermark):
+    """(high, low) watermark of volume *device*: its entry in *watermarks*, else the given defaults."""
+    return (watermarks or {}).get(device, (high_watermark, low_watermark))
+
+def _files(pattern_dir, patterns):
+    files = []
+    for pattern in patterns:
+        files.extend(glob.glob(os.path.join(pattern_dir, pattern)))
+    return files
+
+def _is_archived(path, archive_dir):
+    """A raw segment counts as archived if a file of the same name and size exists in *archive_dir*."""
+    if not archive_dir:
+        return False
+    for candidate in (os.path.join(archive_dir, os.path.basename(path)),
+                      os.path.join(archive_dir, os.path.basename(os.path.dirname(path)), os.path.basename(path))):
+        if os.path.isfile(candidate) and os.path.getsize(candidate) == os.path.getsize(path):
+            return True
+    return False
+
+def _is_processed(video_path, result_dir, tracks_ext="-tracks", detection_ext="-detections"):
+    base_name = ".".join(os.path.basename(video_path).split(".")[:-1])
+    return any(glob.glob(os.path.join(result_dir, f"{base_name}{ext}.*")) for ext in (tracks_ext, detection_ext))
+
+def tier_candidates(tier, result_dir, out_dir=None, archive_dir=None):
+    """Files that may be deleted in retention *tier*, oldest first."""
+    now = time.time()
+    if tier == "temp":
+        files = _files(functions_video.REMUX_CACHE_DIR, ["*"])
+        for directory in (result_dir, functions_video.PREVIEW_CACHE_DIR, functions_video.SAMPLE_CLIP_CACHE_DIR,
+                          functions_video.SCALED_CLIP_CACHE_DIR):
+            files.extend(_files(directory, ["*.part", "*.part.mp4"]))
+        files = [f for f in files if now - os.path.getmtime(f) > TEMP_FILE_MIN_AGE_S]
+    elif tier == "rendered":
+        files = _files(result_dir, ["*-tracked-video.mp4"])
+    elif tier == "previews":
+        files = []
+        for directory in (functions_video.PREVIEW_CACHE_DIR, functions_video.SAMPLE_CLIP_CACHE_DIR,
+                          functions_video.SCALED_CLIP_CACHE_DIR):
+            files.extend(_files(directory, ["*.mp4"]))
+        files = [f for f in files if not f.endswith(".part.mp4")]
+    elif tier == "raw":
+        if not out_dir or not archive_dir:
+            return []  # never delete raw data that is not known to be archived
+        files = []
+        for video_path in _files(out_dir, [f"*{ext}" for ext in RAW_VIDEO_EXTENSIONS]) + \
+                _files(out_dir, [f"*/*{ext}" for ext in RAW_VIDEO_EXTENSIONS]):
+            if _is_processed(video_path, result_dir) and _is_archived(video_path, archive_dir):
+                files.append(video_path)
+                timestamps_path = os.path.splitext(video_path)[0] + ".txt"
+                if os.path.isfile(timestamps_path) and _is_archived(timestamps_path, archive_dir):
+                    files.append(timestamps_path)
+    else:
+        raise ValueError(f"Unknown retention tier {tier}")
+    files = [f for f in set(files) if os.path.isfile(f)]
+    return sorted(files, key=os.path.getmtime)
+
+def enforce_watermarks(paths, result_dir, out_dir=None, archive_dir=None,
+                       high_watermark=DEFAULT_HIGH_WATERMARK, low_watermark=DEFAULT_LOW_WATERMARK,
+                       watermarks=None, tiers=RETENTION_TIERS):
+    """
+    For every volume holding one of *paths* whose usage is above its high
+    watermark, delete files tier by tier (oldest first, only files on that
+    volume) until usage drops below its low watermark. *watermarks* maps
+    volume ids to (high, low); other volumes use *high_watermark* and
+    *low_watermark*. Returns a list of (path, size) deleted.
+    """
+    deleted = []
+    volumes = {volume_id(p): p for p in paths if p}
+    for device, path in volumes.items():
+        high_watermark, low_watermark = _volume_watermarks(device, watermarks, high_watermark, low_watermark)
+        total, used, _ = volume_usage(path)
+        if used / total < high_watermark:
+            continue
+        target_used = low_watermark * total
+        for tier in tiers:
+            for file_path in tier_candidates(tier, result_dir, out_dir=out_dir, archive_dir=archive_dir):
+                if used <= target_used:
+                    break
+                if volume_id(file_path) != device:
+                    continue
+                size = os.path.getsize(file_path)
+                try:
+                    os.remove(file_path)
+                except OSError as e:
+                    print(f"[ERROR] Failed to remove {file_path}: {e}")
+                    continue
+                print(f"[INFO] Storage: removed {tier} file {file_path} ({size / 1e6:.1f} MB)")
+                deleted.append((file_path, size))
+                used -= size
+            if used <= target_used:
+                break
+    return deleted
+
+class StorageGuard:
+    """
+    Enforces the watermarks in a background thread, every *interval_s*
+    seconds, while acquisition is running, so space is freed during unattended
+    recordings without anyone interacting with the GUI. One instance is shared
+    by all browser sessions.
+    """
+
+    def __init__(self):
+        self.settings = None
+        self.enabled = False
+        self.interval_s = STORAGE_CHECK_INTERVAL_S
+        self.last_check = None
+        self.freed_bytes = 0
+        self.n_deleted = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def configure(self, enabled, paths, result_dir, out_dir=None, archive_dir=None,
+                  high_watermark=DEFAULT_HIGH_WATERMARK, low_watermark=DEFAULT_LOW_WATERMARK,
+                  watermarks=None, interval_s=STORAGE_CHECK_INTERVAL_S):
+        """Update the settings used by the next check; disabling stops the thread."""
+        self.settings = dict(paths=list(paths), result_dir=result_dir, out_dir=out_dir, archive_dir=archive_dir,
+                             high_watermark=high_watermark, low_watermark=low_watermark,
+                             watermarks=dict(watermarks or {}))
+        self.interval_s = interval_s
+        self.enabled = enabled
+        if not enabled:
+            self.stop()
+
+    def start(self):
+        if self.running or not self.enabled or self.settings is None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                deleted = enforce_watermarks(**self.settings)
+                self.freed_bytes += sum(size for _, size in deleted)
+                self.n_deleted += len(deleted)
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+            self.last_check = time.time()
+            self._stop.wait(self.interval_s)
+
+@st.cache_resource
+def get_storage_guard():
+    return StorageGuard()
+
+########################################################
+# acquisition pre-flight check
+########################################################
+
+@st.cache_data(ttl=60, show_spinner=False)
+def estimate_bytes_per_second(out_dir, frames_per_second, bitrate=None, subdir="cam-0"):
+    """
+    Bytes per second of recording, estimated from the recorded segments in
+    *out_dir*/*subdir* (size per frame from the timestamp files), falling back
+    to the configured encoder *bitrate* (bits/s).
+    """
+    sizes, frames = 0, 0
+    videos = sorted(_files(os.path.join(out_dir, subdir), ["*.mp4", "*.h264"]), key=os.path.getmtime)[-20:]
+    for video_path in videos:
+        timestamps_path = os.path.splitext(video_path)[0] + ".txt"
+        if not os.path.isfile(timestamps_path):
+            continue
+        with open(timestamps_path, "r") as f:
+            n_frames = sum(1 for line in f if line.strip())
+        if n_frames > 0:
+            sizes += os.path.getsize(video_path)
+            frames += n_frames
+    if frames > 0:
+        return sizes / frames * frames_per_second
+    if bitrate:
+        return bitrate / 8
+    return None
+
+def preflight_check(tmp_dir, out_dir, planned_seconds, bytes_per_second,
+                    high_watermark=DEFAULT_HIGH_WATERMARK, watermarks=None):
+    """
+    Check whether a recording of *planned_seconds* fits on the volumes of
+    *tmp_dir* and *out_dir*. Returns (status, message) with status "ok",
+    "warn" (fits, but pushes a volume over its high watermark, from
+    *watermarks* as in enforce_watermarks) or "refuse" (does not fit).
+    """
+    if not bytes_per_second or not planned_seconds:
+        return "ok", "No size estimate for the recording."
+    projected = planned_seconds * bytes_per_second
+    status, messages = "ok", []
+    for device, path in {volume_id(p): p for p in (tmp_dir, out_dir)}.items():
+        volume_high_watermark, _ = _volume_watermarks(device, watermarks, high_watermark, None)
+        total, used, free = volume_usage(path)
+        if projected > free:
+            status = "refuse"
+            messages.append(f"{path}: recording needs {projected / 1e9:.1f} GB, only {free / 1e9:.1f} GB free")
+        elif (used + projected) / total > volume_high_watermark:
+            status = "warn" if status == "ok" else status
+            messages.append(f"{path}: after the recording the volume is {100 * (used + projected) / total:.0f}% full "
+                            f"(high watermark {100 * volume_high_watermark:.0f}%)")
+    if status == "ok":
+        messages.append(f"Projected recording size {projected / 1e9:.1f} GB fits.")
+    return status, "\n\n".join(messages)
+
+########################################################
+# GUI
+########################################################
+
+def show_storage_panel(tmp_dir, out_dir, result_dir, frames_per_second=6, bitrate=None, subdir="cam-0"):
+    """
+    Streamlit panel with the disk usage of the data volumes, the watermark and
+    retention settings and the acquisition pre-flight check. Nothing is deleted
+    here except on "Free space now"; automatic cleanup runs in the StorageGuard
+    while recording. Returns the pre-flight (status, message).
+    """
+    paths = [p for p in (tmp_dir, out_dir, result_dir, functions_video.PREVIEW_CACHE_DIR) if p]
+    watermarks, invalid = {}, []
+    for device, path in {volume_id(p): p for p in paths}.items():
+        total, used, free = volume_usage(path)
+        col1, col2, col3 = st.columns([4, 1, 1])
+        with col1:
+            st.progress(min(used / total, 1.0),
+                        text=f"{_existing_parent(path)}: {used / 1e9:.0f} / {total / 1e9:.0f} GB used, "
+                             f"{free / 1e9:.0f} GB free")
+        with col2:
+            high = st.number_input("High watermark (%)", min_value=1, max_value=100,
+                                   value=int(DEFAULT_HIGH_WATERMARK * 100), key=f"high_watermark_{device}") / 100
+        with col3:
+            low = st.number_input("Low watermark (%)", min_value=1, max_value=100,
+                                  value=int(DEFAULT_LOW_WATERMARK * 100), key=f"low_watermark_{device}") / 100
+        if low >= high:
+            invalid.append(_existing_parent(path))
+        watermarks[device] = (high, low)
+    if invalid:
+        st.error("The low watermark must be below the high watermark for " + ", ".join(invalid) +
+                 "; the watermark settings are not applied until this is fixed.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        planned_hours = st.number_input("Planned recording (hours)", min_value=0.0, max_value=10000.0, value=24.0)
+    with col2:
+        auto_cleanup = st.checkbox("Automatic cleanup while recording", value=True,
+                                   help=f"While acquisition runs, check every {STORAGE_CHECK_INTERVAL_S} s and free "
+                                        "space by retention tier whenever a volume is above the high watermark")
+    archive_dir = st.text_input("Archive directory (raw segments found here may be deleted locally once processed)",
+                                value="")
+    st.caption("Deletion order: " + "; ".join(f"{i + 1}. {TIER_DESCRIPTIONS[t]}" for i, t in enumerate(RETENTION_TIERS)))
+
+    guard = get_storage_guard()
+    if not invalid:
+        guard.configure(auto_cleanup, paths, result_dir, out_dir=out_dir, archive_dir=archive_dir or None,
+                        watermarks=watermarks)
+    if guard.running:
+        last_check = "-" if guard.last_check is None else f"{time.time() - guard.last_check:.0f} s ago"
+        st.caption(f"Automatic cleanup running: last check {last_check}, "
+                   f"freed {guard.freed_bytes / 1e9:.1f} GB in {guard.n_deleted} files so far.")
+    if guard.error:
+        st.warning(f"Automatic cleanup failed: {guard.error}")
+
+    if st.button("Free space now", key="free_space_btn", disabled=bool(invalid)):
+        deleted = enforce_watermarks(paths, result_dir, out_dir=out_dir, archive_dir=archive_dir or None,
+                                     watermarks=watermarks)
+        if deleted:
+            st.info(f"Freed {sum(size for _, size in deleted) / 1e9:.1f} GB by removing {len(deleted)} files.")
+        else:
+            st.info("All volumes are below the high watermark, nothing was removed.")
+
+    bytes_per_second = estimate_bytes_per_second(out_dir, frames_per_second, bitrate=bitrate, subdir=subdir)
+    status, message = preflight_check(tmp_dir, out_dir, planned_hours * 3600, bytes_per_second,
+                                      watermarks=watermarks)
+    {"ok": st.success, "warn": st.warning, "refuse": st.error}[status](message)
+    return status, message
@@ -0,0 +1,250 @@
+import streamlit as st
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+########################################################
+# incrementally maintained per-bee summary tables
+########################################################
+#
+# result_dir/summary/
+#   contributions/<video>.parquet  per-video rows, keyed by bee_id x time_bucket x cam_id
+#   manifest.json                  {video: [time buckets it contributes to]}
+#   bee_summary.parquet            materialized sum of all contributions
+#
+# Writing the contribution of a video replaces its previous one, and only the
+# time buckets touched by the old or new contribution are recomputed, so
+# re-running the pipeline on a video is idempotent and cheap.
+
+SUMMARY_DIRNAME = "summary"
+SUMMARY_BUCKET = "1h"
+SUMMARY_KEYS = ["bee_id", "time_bucket", "cam_id"]
+SUMMARY_COLUMNS = SUMMARY_KEYS + ["n_detections", "observed_s", "distance", "first_seen", "last_seen"]
+
+def _summary_paths(result_dir):
+    summary_dir = os.path.join(result_dir, SUMMARY_DIRNAME)
+    return {
+        "dir": summary_dir,
+        "contributions": os.path.join(summary_dir, "contributions"),
+        "manifest": os.path.join(summary_dir, "manifest.json"),
+        "table": os.path.join(summary_dir, "bee_summary.parquet"),
+        "lock": os.path.join(summary_dir, ".lock"),
+    }
+
+def video_key(video_path):
+    """Key of a video in the summary (file name without extension)."""
+    return os.path.splitext(os.path.basename(video_path))[0]
+
+def video_cam_id(video_path):
+    """Camera name from the video file name, e.g. 'cam-0' for 'cam-0_20250122T13...mp4'."""
+    return os.path.basename(video_path).split("_")[0]
+
+def _empty_summary():
+    return pd.DataFrame({
+        "bee_id": pd.Series(dtype="int64"),
+        "time_bucket": pd.Series(dtype="datetime64[ns, UTC]"),
+        "cam_id": pd.Series(dtype="object"),
+        "n_detections": pd.Series(dtype="int64"),
+        "observed_s": pd.Series(dtype="float64"),
+        "distance": pd.Series(dtype="float64"),
+        "first_seen": pd.Series(dtype="datetime64[ns, UTC]"),
+        "last_seen": pd.Series(dtype="datetime64[ns, UTC]"),
+    })
+
+def compute_contribution(tracks_df, cam_id):
+    """
+    Aggregate one video's tracks into rows keyed by bee_id x time_bucket x cam_id:
+    number of detections, time observed (distinct frames x frame interval),
+    distance travelled along its tracks (hive coordinates) and first/last seen.
+    """
+    if tracks_df is None or len(tracks_df) == 0:
+        return _empty_summary()
+    df = tracks_df[tracks_df.bee_id.notnull()][["bee_id", "track_id", "timestamp_posix", "x_hive", "y_hive"]].copy()
+    if len(df) == 0:
+        return _empty_summary()
+    df["bee_id"] = df.bee_id.astype("int64")
+    df["time"] = pd.to_datetime(df.timestamp_posix, unit="s", utc=True)
+    df["time_bucket"] = df.time.dt.floor(SUMMARY_BUCKET)
+
+    # frame interval of the video, to turn observed frames into seconds
+    frame_times = np.unique(df.timestamp_posix.values)
+    frame_interval = float(np.median(np.diff(frame_times))) if len(frame_times) > 1 else 0.0
+
+    # distance between consecutive detections of the same track, counted in the bucket of the later one
+    df = df.sort_values(["track_id", "timestamp_posix"])
+    same_track = df.track_id.eq(df.track_id.shift())
+    step = np.hypot(df.x_hive.diff(), df.y_hive.diff())
+    df["step"] = step.where(same_track, 0.0).fillna(0.0)
+
+    grouped = df.groupby(["bee_id", "time_bucket"])
+    contribution = pd.DataFrame({
+        "n_detections": grouped.size(),
+        "observed_s": grouped.timestamp_posix.nunique() * frame_interval,
+        "distance": grouped.step.sum(),
+        "first_seen": grouped.time.min(),
+        "last_seen": grouped.time.max(),
+    }).reset_index()
+    contribution.insert(2, "cam_id", cam_id)
+    return contribution[SUMMARY_COLUMNS]
+
+def _aggregate(contributions):
+    if len(contributions) == 0:
+        return _empty_summary()
+    return contributions.groupby(SUMMARY_KEYS, as_index=False).agg(
+        n_detections=("n_detections", "sum"),
+        observed_s=("observed_s", "sum"),
+        distance=("distance", "sum"),
+        first_seen=("first_seen", "min"),
+        last_seen=("last_seen", "max"),
+    )[SUMMARY_COLUMNS]
+
+def _read_manifest(paths):
+    if not os.path.isfile(paths["manifest"]):
+        return {}
+    with open(paths["manifest"], "r") as f:
+        return json.load(f)
+
+def _atomic_write_json(obj, path):
+    tmp_path = path + ".part"
+    with open(tmp_path, "w") as f:
+        json.dump(obj, f, indent=1)
+    os.replace(tmp_path, path)
+
+def _atomic_write_parquet(df, path):
+    tmp_path = path + ".part"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def summary_has_video(result_dir, video_path):
+    return video_key(video_path) in _read_manifest(_summary_paths(result_dir))
+
+def update_summary(result_dir, video_path, tracks_df):
+    """
+    Replace the contribution of *video_path* by its current *tracks_df* and
+    update the materialized summary for the affected time buckets only.
+    """
+    return _update_summary(result_dir, video_key(video_path), video_cam_id(video_path), tracks_df)
+
+def _update_summary(result_dir, key, cam_id, tracks_df):
+    import fcntl
+
+    paths = _summary_paths(result_dir)
+    os.makedirs(paths["contributions"], exist_ok=True)
+    contribution = compute_contribution(tracks_df, cam_id)
+    new_buckets = sorted({ts.isoformat() for ts in contribution.time_bucket})
+
+    # pipeline workers may finish concurrently, serialize the read-modify-write
+    with open(paths["lock"], "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        manifest = _read_manifest(paths)
+        affected = set(manifest.get(key, [])) | set(new_buckets)
+        affected_ts = pd.to_datetime(sorted(affected), utc=True)
+        _atomic_write_parquet(contribution, os.path.join(paths["contributions"], key + ".parquet"))
+        manifest[key] = new_buckets
+
+        # recompute the affected buckets from all videos contributing to them
+        parts = []
+        for other_key, buckets in manifest.items():
+            if affected & set(buckets):
+                part = pd.read_parquet(os.path.join(paths["contributions"], other_key + ".parquet"))
+                parts.append(part[part.time_bucket.isin(affected_ts)])
+        recomputed = _aggregate(pd.concat(parts, ignore_index=True)) if parts else _empty_summary()
+
+        if os.path.isfile(paths["table"]):
+            table = pd.read_parquet(paths["table"])
+            table = table[~table.time_bucket.isin(affected_ts)]
+            table = pd.concat([table, recomputed], ignore_index=True) if len(recomputed) else table
+        else:
+            table = recomputed
+        table = table.sort_values(["time_bucket", "bee_id", "cam_id"]).reset_index(drop=True)
+
+        _atomic_write_parquet(table, paths["table"])
+        _atomic_write_json(manifest, paths["manifest"])
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return contribution
+
+def backfill_summary(result_dir, tracks_ext="-tracks", save_filetype="parquet"):
+    """Add all tracks files in *result_dir* that are not in the summary yet. Returns the number added."""
+    manifest = _read_manifest(_summary_paths(result_dir))
+    n_added = 0
+    for tracks_filename in sorted(glob.glob(os.path.join(result_dir, f"*{tracks_ext}.{save_filetype}"))):
+        video_name = os.path.basename(tracks_filename)[:-len(f"{tracks_ext}.{save_filetype}")]
+        if video_name in manifest:
+            continue
+        if save_filetype == "csv":
+            tracks_df = pd.read_csv(tracks_filename)
+        else:
+            tracks_df = pd.read_parquet(tracks_filename)
+        _update_summary(result_dir, video_name, video_cam_id(video_name), tracks_df)
+        n_added += 1
+    return n_added
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_summary_cached(table_path, mtime_ns):
+    return pd.read_parquet(table_path)
+
+def load_summary(result_dir):
+    """The materialized summary table; cached until the file changes."""
+    table_path = _summary_paths(result_dir)["table"]
+    if not os.path.isfile(table_path):
+        return _empty_summary()
+    return _load_summary_cached(table_path, os.stat(table_path).st_mtime_ns)
+
+def per_bee_totals(summary, start=None, end=None, cam_ids=None):
+    """Totals per bee over the selected time window and cameras."""
+    if start is not None:
+        summary = summary[summary.time_bucket >= start]
+    if end is not None:
+        summary = summary[summary.time_bucket < end]
+    if cam_ids:
+        summary = summary[summary.cam_id.isin(cam_ids)]
+    return summary.groupby("bee_id").agg(
+        n_detections=("n_detections", "sum"),
+        observed_h=("observed_s", lambda s: s.sum() / 3600),
+        distance=("distance", "sum"),
+        first_seen=("first_seen", "min"),
+        last_seen=("last_seen", "max"),
+    ).sort_values("n_detections", ascending=False)
+
+def show_summary_panel(result_dir, tracks_ext="-tracks", save_filetype="parquet"):
+    """Streamlit panel answering per-bee questions from the summary table."""
+    if st.button("Add missing tracks files to summary", key="summary_backfill_btn"):
+        with st.spinner("Adding tracks files to the summary..."):
+            n_added = backfill_summary(result_dir, tracks_ext=tracks_ext, save_filetype=save_filetype)
+        st.write(f"Added {n_added} videos.")
+
+    summary = load_summary(result_dir)
+    if len(summary) == 0:
+        st.info("No summary yet. Run the pipeline with tracking, or add existing tracks files.")
+        return
+
+    first_day = summary.time_bucket.min().date()
+    last_day = summary.time_bucket.max().date()
+    col1, col2 = st.columns(2)
+    with col1:
+        day_range = st.date_input("Days", value=(first_day, last_day), min_value=first_day, max_value=last_day)
+    with col2:
+        cam_ids = st.multiselect("Cameras", sorted(summary.cam_id.unique()))
+    if isinstance(day_range, (tuple, list)) and len(day_range) == 2:
+        start = pd.Timestamp(day_range[0], tz="UTC")
+        end = pd.Timestamp(day_range[1], tz="UTC") + pd.Timedelta(days=1)
+    else:
+        start, end = None, None
+
+    totals = per_bee_totals(summary, start=start, end=end, cam_ids=cam_ids)
+    st.write(f"{len(totals)} bees")
+    st.dataframe(totals)
+
+    bee_ids = st.multiselect("Observed time per hour for bees", totals.index.tolist()[:1000])
+    if bee_ids:
+        selection = summary[summary.bee_id.isin(bee_ids)]
+        if start is not None:
+            selection = selection[(selection.time_bucket >= start) & (selection.time_bucket < end)]
+        if cam_ids:
+            selection = selection[selection.cam_id.isin(cam_ids)]
+        per_hour = selection.pivot_table(index="time_bucket", columns="bee_id", values="observed_s", aggfunc="sum")
+        st.line_chart(per_hour / 60, y_label="minutes observed")
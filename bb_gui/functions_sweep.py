@@ -0,0 +1,119 @@
+import streamlit as st
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+import functions_data_and_pipeline
+import functions_video
+
+########################################################
+# detection parameter sweep on cached sample frames
+########################################################
+
+def load_sample_frames(video_path, n_samples=30):
+    """Grayscale sample frames of *video_path*, decoded from the cached sample clip."""
+    import cv2
+
+    clip_path = functions_video.extract_sample_clip(video_path, n_samples=n_samples)
+    frames = []
+    cap = cv2.VideoCapture(clip_path)
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    return frames
+
+def get_sweep_pipeline(timestamp_format="basler"):
+    """The cached detection pipeline the pipeline runs use for *timestamp_format*."""
+    if timestamp_format == "rpi":
+        return functions_data_and_pipeline.build_polo_pipeline()
+    return functions_data_and_pipeline.build_default_pipeline()
+
+def summarize_detections(video_dataframe, confidence_threshold, n_frames):
+    """Detection counts and confidence distribution of one setting above *confidence_threshold*."""
+    tagged = video_dataframe[(video_dataframe.detection_type == "TaggedBee")
+                             & (video_dataframe.confidence >= confidence_threshold)]
+    n_untagged = int((video_dataframe.detection_type != "TaggedBee").sum())
+    confidences = tagged.confidence.values.astype(float)
+    quantiles = np.quantile(confidences, [0.1, 0.5, 0.9]) if len(confidences) else [np.nan] * 3
+    return {
+        "n_tagged": len(tagged),
+        "n_untagged": n_untagged,
+        "tagged_per_frame": len(tagged) / max(n_frames, 1),
+        "n_bee_ids": tagged.beeID.astype(str).nunique() if "beeID" in tagged else np.nan,
+        "confidence_p10": quantiles[0],
+        "confidence_median": quantiles[1],
+        "confidence_p90": quantiles[2],
+    }
+
+def run_parameter_sweep(video_path, tag_pixel_diameters, clahe_options=(True,), confidence_thresholds=(0.01,),
+                        n_samples=30, decoder_pipeline=None):
+    """
+    Evaluate a grid of detection parameters on a sample of frames of *video_path*.
+
+    The sample frames are decoded once (through a cached clip) and kept in
+    memory. Every combination of tag diameter and CLAHE runs the detection on
+    these frames with the same *decoder_pipeline*, in parallel across the
+    frames (bb_behavior's parallel jobs, as in the pipeline runs). The settings
+    run one after another, since they share the pipeline and its models. Confidence
+    thresholds are filters on the detections and are applied afterwards,
+    without running the detection again.
+
+    Returns a dataframe with one row per parameter combination.
+    """
+    if decoder_pipeline is None:
+        decoder_pipeline = get_sweep_pipeline()
+    frames = load_sample_frames(video_path, n_samples=n_samples)
+    n_frames = len(frames)
+
+    rows = []
+    for tag_pixel_diameter, use_clahe in itertools.product(tag_pixel_diameters, clahe_options):
+        video_dataframe = functions_data_and_pipeline.detect_markers_in_frames(
+            frames, tag_pixel_diameter, use_clahe=use_clahe, decoder_pipeline=decoder_pipeline,
+            use_parallel_jobs=True)
+        for confidence_threshold in confidence_thresholds:
+            rows.append({
+                "tag_pixel_diameter": tag_pixel_diameter,
+                "use_clahe": use_clahe,
+                "confidence_threshold": confidence_threshold,
+                **summarize_detections(video_dataframe, confidence_threshold, n_frames),
+            })
+    return pd.DataFrame(rows)
+
+def _parse_number_list(text, cast=float):
+    return [cast(v) for v in text.replace(";", ",").split(",") if v.strip()]
+
+def show_parameter_sweep(video_path, timestamp_format="basler"):
+    """Streamlit panel to run a parameter sweep on *video_path* with the pipeline of *timestamp_format*."""
+    st.write(f"Sweep detection settings on sampled frames of {os.path.basename(video_path)}")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        diameters_text = st.text_input("tag_pixel_diameter values", value="35, 40, 45, 50")
+    with col2:
+        clahe_options = st.multiselect("CLAHE", [True, False], default=[True, False])
+    with col3:
+        thresholds_text = st.text_input("confidence thresholds", value="0.01, 0.1, 0.5")
+    n_samples = st.number_input("Sample frames", min_value=1, max_value=1000, value=30)
+
+    if st.button("Run Parameter Sweep", key="sweep_btn"):
+        try:
+            tag_pixel_diameters = _parse_number_list(diameters_text)
+            confidence_thresholds = _parse_number_list(thresholds_text)
+        except ValueError:
+            st.error("Could not parse the parameter values, use comma separated numbers.")
+            return
+        if not tag_pixel_diameters or not clahe_options or not confidence_thresholds:
+            st.warning("Select at least one value for each parameter.")
+            return
+        with st.spinner(f"Running {len(tag_pixel_diameters) * len(clahe_options)} detection settings..."):
+            sweep_df = run_parameter_sweep(video_path, tag_pixel_diameters, clahe_options, confidence_thresholds,
+                                           n_samples=int(n_samples),
+                                           decoder_pipeline=get_sweep_pipeline(timestamp_format))
+        st.session_state["sweep_results"] = sweep_df
+
+    if "sweep_results" in st.session_state:
+        st.dataframe(st.session_state["sweep_results"], hide_index=True)
@@ -0,0 +1,342 @@
+import streamlit as st
+import hashlib
+import os
+import subprocess
+import time
+
+########################################################
+# preview proxies for the video player
+########################################################
+
+PREVIEW_CACHE_DIR = os.path.expanduser("~/.cache/bb_gui/previews")
+PREVIEW_CACHE_MAX_BYTES = 5 * 1024**3
+
+# preview name -> output height in pixels ("original" plays the file itself)
+PREVIEW_SIZES = {"low": 480, "medium": 960, "high": 1920}
+
+SAMPLE_CLIP_CACHE_DIR = os.path.expanduser("~/.cache/bb_gui/samples")
+REMUX_CACHE_DIR = os.path.expanduser("~/.cache/bb_gui/remux")
+SCALED_CLIP_CACHE_DIR = os.path.expanduser("~/.cache/bb_gui/scaled")
+SCALED_CLIP_CACHE_MAX_BYTES = 20 * 1024**3
+
+def get_video_height(video_path):
+    """Extracts the frame height from video metadata using OpenCV (None if unknown)."""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+    cap.release()
+
+    if height > 0:
+        return int(height)
+    else:
+        return None
+
+def pick_preview_height(video_path, preview_size="low"):
+    """Return the proxy height to use for *video_path*, never upscaling the source."""
+    height = PREVIEW_SIZES[preview_size]
+    src_height = get_video_height(video_path)
+    if src_height is not None and src_height < height:
+        # round down to an even number, required by libx264 with yuv420p
+        height = src_height - (src_height % 2)
+    return height
+
+def _cache_filename(src_path, suffix, cache_dir):
+    """Cache file name derived from *src_path*; changes whenever the source file changes."""
+    stat = os.stat(src_path)
+    key = f"{os.path.abspath(src_path)}|{stat.st_size}|{stat.st_mtime_ns}|{suffix}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    base_name = os.path.splitext(os.path.basename(src_path))[0]
+    return os.path.join(cache_dir, f"{base_name}-{suffix}-{digest}.mp4")
+
+def _preview_filename(src_path, height, cache_dir=PREVIEW_CACHE_DIR):
+    return _cache_filename(src_path, f"{height}p", cache_dir)
+
+def create_preview(src_path, dst_path, height, fps_fallback="30", keyframe_interval_s=1):
+    """
+    Transcode *src_path* to a small H.264 MP4 preview of the given height.
+
+    The moov atom is moved to the front (faststart) so the browser can start
+    playing and seek with range requests without downloading the whole file,
+    and a keyframe is forced every *keyframe_interval_s* seconds so seeking
+    lands close to the requested position.
+    """
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    tmp_path = dst_path + ".part.mp4"
+    cmd = ["ffmpeg", "-y", "-loglevel", "error"]
+    if src_path.lower().endswith(".h264"):
+        cmd += ["-framerate", fps_fallback]  # needed because raw .h264 has no timing
+    cmd += [
+        "-i", src_path,
+        "-an",
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264",
+        "-preset", "veryfast",
+        "-crf", "28",
+        "-pix_fmt", "yuv420p",
+        "-force_key_frames", f"expr:gte(t,n_forced*{keyframe_interval_s})",
+        "-movflags", "+faststart",
+        tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dst_path
+
+def evict_preview_cache(max_bytes=PREVIEW_CACHE_MAX_BYTES, cache_dir=PREVIEW_CACHE_DIR, keep=()):
+    """Delete least recently used previews until the cache is smaller than *max_bytes*."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_atime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    n_removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            n_removed += 1
+        except OSError as e:
+            print(f"[ERROR] Failed to remove preview {path}: {e}")
+    return n_removed
+
+def get_preview_path(src_path, preview_size="low", fps_fallback="30",
+                     cache_dir=PREVIEW_CACHE_DIR, max_cache_bytes=PREVIEW_CACHE_MAX_BYTES):
+    """
+    Return the path of a browser-friendly preview of *src_path*, creating and
+    caching it if needed. Returns None if the preview could not be created.
+    """
+    height = pick_preview_height(src_path, preview_size)
+    dst_path = _preview_filename(src_path, height, cache_dir=cache_dir)
+    if os.path.isfile(dst_path):
+        now = time.time()
+        os.utime(dst_path, (now, now))  # mark as recently used for the LRU eviction
+        return dst_path
+
+    try:
+        with st.spinner(f"Creating {height}p preview of {os.path.basename(src_path)}..."):
+            create_preview(src_path, dst_path, height, fps_fallback=fps_fallback)
+    except (subprocess.CalledProcessError, FileNotFoundError) as err:
+        st.error(f"Could not create a preview of {os.path.basename(src_path)}.\n\n{err}")
+        return None
+
+    evict_preview_cache(max_cache_bytes, cache_dir=cache_dir, keep=(dst_path,))
+    return dst_path
+
+########################################################
+# sampled frames for parameter tuning
+########################################################
+
+def extract_sample_clip(src_path, n_samples=30, fps_fallback="30", cache_dir=SAMPLE_CLIP_CACHE_DIR):
+    """
+    Decode *src_path* once and store *n_samples* evenly spaced frames as a
+    short, losslessly encoded clip at full resolution. The clip is cached, so
+    repeated detection runs (e.g. a parameter sweep) only decode these frames.
+    """
+    clip_path = _cache_filename(src_path, f"sample{n_samples}", cache_dir)
+    if os.path.isfile(clip_path):
+        return clip_path
+    os.makedirs(cache_dir, exist_ok=True)
+
+    from functions_data_and_pipeline import get_video_frame_count
+    n_frames = get_video_frame_count(src_path)
+    step = max(1, (n_frames or n_samples) // n_samples)
+
+    tmp_path = clip_path + ".part.mp4"
+    cmd = ["ffmpeg", "-y", "-loglevel", "error"]
+    if src_path.lower().endswith(".h264"):
+        cmd += ["-framerate", fps_fallback]  # needed because raw .h264 has no timing
+    cmd += [
+        "-i", src_path,
+        "-an",
+        "-vf", f"select='not(mod(n\\,{step}))',setpts=N/FRAME_RATE/TB",
+        "-frames:v", str(n_samples),
+        "-c:v", "libx264",
+        "-qp", "0",  # lossless, detection sees the same pixels as on the source
+        "-preset", "ultrafast",
+        tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        os.replace(tmp_path, clip_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return clip_path
+
+########################################################
+# single decode pass shared by detection, snapshot and rendering
+########################################################
+
+_END_OF_VIDEO = None
+
+class FrameConsumer:
+    """Base class for consumers of a FrameSource. ``consume`` returns False once no more frames are needed."""
+
+    def consume(self, frame_idx, frame):
+        return True
+
+    def close(self):
+        pass
+
+class FirstFrameSnapshot(FrameConsumer):
+    """Keeps the first decoded frame (RGB), e.g. for the detections PNG."""
+
+    def __init__(self):
+        self.frame = None
+
+    def consume(self, frame_idx, frame):
+        import cv2
+        self.frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB if frame.ndim == 2 else cv2.COLOR_BGR2RGB)
+        return False
+
+class FrameSource:
+    """
+    Decodes a video once and fans every frame out to several consumers.
+
+    Each consumer runs in its own thread and is fed through a queue of at
+    most *buffer_size* frames, so a slow consumer throttles decoding instead
+    of letting frames pile up in memory. Consumers that return False from
+    ``consume`` stop receiving frames; decoding stops when no consumer needs
+    more frames. With *grayscale* the frames are converted once in the
+    decoder and all consumers get single channel frames (a third of the memory).
+    """
+
+    def __init__(self, video_path, consumers, buffer_size=2, grayscale=False):
+        self.video_path = video_path
+        self.consumers = list(consumers)
+        self.buffer_size = buffer_size
+        self.grayscale = grayscale
+
+    def _consumer_loop(self, consumer, frame_queue, state):
+        end_seen = False
+        try:
+            while True:
+                item = frame_queue.get()
+                if item is _END_OF_VIDEO:
+                    end_seen = True
+                    break
+                if state["active"] and not consumer.consume(*item):
+                    state["active"] = False
+        except Exception as e:
+            state["active"] = False
+            state["error"] = e
+            # keep draining so the decoder never blocks on this queue
+            while not end_seen:
+                end_seen = frame_queue.get() is _END_OF_VIDEO
+        if state["error"] is not None:
+            return  # do not finish the output of a consumer that failed
+        try:
+            consumer.close()
+        except Exception as e:
+            # e.g. the last detection window or the ffmpeg encoder failing; raised by run() after the join
+            state["error"] = e
+
+    def run(self, progress=None):
+        """Decode the video and feed all consumers. *progress* is an optional tqdm-like callable."""
+        import cv2
+        import queue
+        import threading
+
+        states = [{"active": True, "error": None} for _ in self.consumers]
+        queues = [queue.Queue(maxsize=self.buffer_size) for _ in self.consumers]
+        threads = [threading.Thread(target=self._consumer_loop, args=(c, q, s), daemon=True)
+                   for c, q, s in zip(self.consumers, queues, states)]
+        for thread in threads:
+            thread.start()
+
+        stage_progress = progress() if progress is not None else None
+        cap = cv2.VideoCapture(self.video_path)
+        frame_idx = 0
+        try:
+            while any(state["active"] for state in states):
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if self.grayscale:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                for frame_queue, state in zip(queues, states):
+                    if state["active"]:
+                        frame_queue.put((frame_idx, frame))
+                frame_idx += 1
+                if stage_progress is not None:
+                    stage_progress.update(1)
+        finally:
+            cap.release()
+            for frame_queue in queues:
+                frame_queue.put(_END_OF_VIDEO)
+            for thread in threads:
+                thread.join()
+            if stage_progress is not None:
+                stage_progress.close()
+
+        for state in states:
+            if state["error"] is not None:
+                raise state["error"]
+        return frame_idx
+
+class ScaledClipWriter(FrameConsumer):
+    """
+    Writes every frame, downscaled by *scale_factor*, to an intermediate H.264
+    clip with the frame rate of the source, so the tracked video can later be
+    rendered from it without decoding the full resolution video again.
+    ``scale`` is the exact factor after rounding the size to even numbers.
+    """
+
+    def __init__(self, output_path, fps, scale_factor=0.25):
+        self.output_path = output_path
+        self.fps = fps or 6
+        self.scale_factor = scale_factor
+        self.scale = scale_factor
+        self._proc = None
+        self._tmp_path = output_path + ".part.mp4"
+
+    def _open(self, frame_shape):
+        height, width = frame_shape[:2]
+        self.size = (int(width * self.scale_factor) // 2 * 2, int(height * self.scale_factor) // 2 * 2)
+        self.scale = self.size[0] / width
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "gray" if len(frame_shape) == 2 else "bgr24",
+            "-s", f"{self.size[0]}x{self.size[1]}",
+            "-r", str(self.fps),
+            "-i", "-",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+            "-pix_fmt", "yuv420p",
+            self._tmp_path,
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def consume(self, frame_idx, frame):
+        import cv2
+
+        if self._proc is None:
+            self._open(frame.shape)
+        self._proc.stdin.write(cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).tobytes())
+        return True
+
+    def close(self):
+        if self._proc is None:
+            return
+        self._proc.stdin.close()
+        stderr = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            raise RuntimeError(f"ffmpeg failed to write {self.output_path}: {stderr.decode(errors='replace')}")
+        os.replace(self._tmp_path, self.output_path)
+
+def scaled_clip_path(src_path, scale_factor, cache_dir=SCALED_CLIP_CACHE_DIR):
+    """Cache path of the intermediate clip of *src_path* downscaled by *scale_factor*."""
+    return _cache_filename(src_path, f"x{scale_factor:g}", cache_dir)
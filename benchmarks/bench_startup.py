@@ -0,0 +1,72 @@
+"""
+Startup benchmark for the bb_gui Streamlit app.
+
+Measures
+  * cold import time of the app modules in a fresh interpreter,
+  * time of the first (cold) script run,
+  * median time of a rerun triggered by a widget interaction.
+
+Usage:
+    python benchmarks/bench_startup.py [--reruns 10] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bb_gui")
+APP_SCRIPT = os.path.join(APP_DIR, "bb_gui.py")
+
+def measure_cold_import(module_name):
+    """Import *module_name* in a fresh interpreter and return the wall time in seconds."""
+    code = (
+        "import sys, time; sys.path.insert(0, {!r}); "
+        "t = time.perf_counter(); import {}; print(time.perf_counter() - t)"
+    ).format(APP_DIR, module_name)
+    out = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, check=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def measure_app_runs(n_reruns):
+    """Run the app with Streamlit's AppTest and time the first run and the reruns."""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, APP_DIR)
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=600)
+
+    t = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - t
+
+    rerun_times = []
+    for _ in range(n_reruns):
+        t = time.perf_counter()
+        at.button(key="refresh_btn").click().run()
+        rerun_times.append(time.perf_counter() - t)
+    return first_run, rerun_times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=10, help="number of widget-triggered reruns to time")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "import_functions_acquisition_s": measure_cold_import("functions_acquisition"),
+        "import_functions_data_and_pipeline_s": measure_cold_import("functions_data_and_pipeline"),
+    }
+    first_run, rerun_times = measure_app_runs(args.reruns)
+    results["first_run_s"] = first_run
+    results["rerun_median_s"] = statistics.median(rerun_times)
+    results["rerun_max_s"] = max(rerun_times)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, value in results.items():
+            print(f"{name:40s} {value * 1000:10.1f} ms")
+
+if __name__ == "__main__":
+    main()